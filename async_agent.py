@@ -0,0 +1,145 @@
+"""Asyncio version of the agent loop in main.py.
+
+Model calls go through the SDK's `client.aio` surface and tool calls are
+dispatched without blocking the event loop, so one process can drive many
+sessions concurrently:
+
+    results = await asyncio.gather(
+        *(run_agent(client, prompt) for prompt in prompts)
+    )
+"""
+
+import asyncio
+
+from call_function import call_functions_async, get_generate_config
+from client_manager import get_client
+from config import MAX_ITERS, WORKING_DIR
+from constants import model_name
+from functions.prefetch import Prefetcher
+from functions.python_worker_pool import enable_worker_pool
+from functions.tool_cache import ToolResultCache
+from history import HistoryManager
+from lazy_imports import LazyModule
+from main import (
+    create_session,
+    get_cli_parser,
+    record_function_results,
+    record_response,
+    report_compaction,
+    report_prefetch,
+    resume_session,
+)
+from response_cache import ResponseCache
+from telemetry import enable_tracing, record_usage, span
+
+types = LazyModule("google.genai.types")
+
+
+async def generate_content_async(
+    client, messages, verbose, tool_cache=None, working_directory=WORKING_DIR, quiet=False
+):
+    with span("model", "generate_content") as attrs:
+        response = await client.aio.models.generate_content(
+            model=model_name,
+            contents=messages,
+            config=get_generate_config(),
+        )
+        record_usage(attrs, response.usage_metadata)
+    if not record_response(response, messages, verbose):
+        return response.text
+
+    function_call_results = await call_functions_async(
+        response.function_calls, verbose, tool_cache, working_directory, quiet
+    )
+    record_function_results(function_call_results, messages, verbose)
+
+
+async def call_generate_content_async(
+    client,
+    messages,
+    is_verbose,
+    max_iters=MAX_ITERS,
+    prefetch=False,
+    session_log=None,
+    working_directory=WORKING_DIR,
+    on_turn=None,
+    quiet=False,
+):
+    """Run the agent loop until the model answers without calling tools.
+
+    Tools run in working_directory. on_turn, if given, is called after
+    every iteration with the contents it added to messages and the
+    exception it failed with, or None. quiet keeps the loop from printing
+    anything, for callers that report through on_turn instead.
+    """
+    tool_cache = ToolResultCache()
+    prefetcher = Prefetcher(tool_cache) if prefetch else None
+    history = HistoryManager()
+    try:
+        for _ in range(max_iters):
+            start = len(messages)
+            error = None
+            try:
+                report_compaction(history, history.compact(messages), is_verbose)
+                final_response = await generate_content_async(
+                    client, messages, is_verbose, tool_cache, working_directory, quiet
+                )
+                if final_response:
+                    if session_log:
+                        session_log.finish(messages, final_response)
+                    if on_turn:
+                        on_turn(messages[start:], None)
+                    return final_response
+
+            except Exception as e:
+                error = e
+                if not quiet:
+                    print(f"Error in generate_content: {e}")
+            if session_log:
+                session_log.sync(messages)
+            if on_turn:
+                on_turn(messages[start:], error)
+        raise RuntimeError(f"Maximum iterations ({max_iters}) reached.")
+    finally:
+        if quiet and prefetcher is not None:
+            prefetcher.close()
+        else:
+            report_prefetch(prefetcher)
+
+
+async def run_agent(client, user_prompt, verbose=False, max_iters=MAX_ITERS, prefetch=False):
+    messages = [types.Content(role="user", parts=[types.Part(text=user_prompt)])]
+    return await call_generate_content_async(
+        client, messages, verbose, max_iters, prefetch
+    )
+
+
+async def main():
+    args = get_cli_parser()
+    client = ResponseCache(mode=args.cache).wrap(get_client())
+    if args.worker_pool:
+        enable_worker_pool().warm(WORKING_DIR)
+    if args.resume:
+        session_log, messages = resume_session(args)
+        if messages is None:
+            return
+    else:
+        session_log = create_session(args)
+        messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
+    if args.verbose and args.user_prompt:
+        print(f"User prompt: {args.user_prompt}\n")
+    tracer = enable_tracing() if args.trace else None
+    try:
+        final_response = await call_generate_content_async(
+            client, messages, args.verbose, prefetch=args.prefetch, session_log=session_log
+        )
+    finally:
+        session_log.close()
+        if tracer:
+            tracer.export_jsonl(args.trace)
+            tracer.print_summary()
+    print(f"Final response:\n{final_response}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
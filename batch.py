@@ -0,0 +1,124 @@
+"""Run many prompts as independent agent sessions across worker processes.
+
+    python batch.py prompts.jsonl results.jsonl --workers 8
+
+Each input line is a JSON object with a "prompt" and an optional "id".
+Every worker process imports the SDK and builds its client once, then runs
+sessions one after another. A result line (final response, status, token
+counts, tool calls and timing) is appended to the output as soon as each
+session finishes, so partial results survive an interrupted run.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from google.genai import types
+
+from config import BATCH_WORKERS
+from response_cache import CACHE_MODES, ResponseCache
+from telemetry import enable_tracing
+
+_client = None
+_fixture = None
+
+
+def init_worker(fixture, cache_mode):
+    global _client, _fixture
+    _fixture = fixture
+    enable_tracing()
+    if fixture:
+        return
+    from client_manager import get_client as get_shared_client
+
+    _client = ResponseCache(mode=cache_mode).wrap(get_shared_client())
+
+
+def get_client():
+    if _fixture:
+        # Scripted clients carry per-session state, so each session gets one.
+        from fake_gemini import ScriptedClient
+
+        return ScriptedClient.from_fixture(_fixture)
+    return _client
+
+
+def run_prompt(item):
+    from main import call_generate_content
+
+    tracer = enable_tracing()
+    tracer.clear()
+    result = {"id": item["id"], "status": "ok", "response": None, "error": None}
+    start = time.perf_counter()
+    try:
+        # A bad input line fails its own session, not the whole run.
+        prompt = item.get("prompt")
+        if not isinstance(prompt, str):
+            raise ValueError('input line has no "prompt" string')
+        messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+        with contextlib.redirect_stdout(io.StringIO()):
+            result["response"] = call_generate_content(get_client(), messages, False)
+    except SystemExit:
+        result["status"] = "max_iters"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["duration_s"] = round(time.perf_counter() - start, 3)
+    model_spans = [s for s in tracer.spans if s["kind"] == "model"]
+    result["model_calls"] = len(model_spans)
+    result["tool_calls"] = sum(1 for s in tracer.spans if s["kind"] == "tool")
+    result["prompt_tokens"] = sum(s.get("prompt_tokens") or 0 for s in model_spans)
+    result["response_tokens"] = sum(s.get("response_tokens") or 0 for s in model_spans)
+    return result
+
+
+def read_prompts(path):
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", line_number)
+            yield item
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run prompts from a JSONL file")
+    parser.add_argument("prompts", help="Input JSONL, one {\"prompt\": ...} per line")
+    parser.add_argument("output", help="Output JSONL, appended as sessions finish")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument(
+        "--fake", metavar="FIXTURE", help="Use a scripted client fixture instead of Gemini"
+    )
+    parser.add_argument(
+        "--cache", choices=CACHE_MODES, default="bypass"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = {}
+    with (
+        ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=init_worker,
+            initargs=(args.fake, args.cache),
+        ) as executor,
+        open(args.output, "a") as out,
+    ):
+        futures = [executor.submit(run_prompt, item) for item in read_prompts(args.prompts)]
+        for future in as_completed(futures):
+            result = future.result()
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+    print(f"{sum(counts.values())} sessions in {elapsed:.2f}s ({summary})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
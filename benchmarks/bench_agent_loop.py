@@ -0,0 +1,113 @@
+"""End-to-end benchmark of the agent loop against a scripted fake client.
+
+    python -m benchmarks.bench_agent_loop --sessions 200 --mode async
+    python -m benchmarks.bench_agent_loop --fixture fixtures/calculator_tests.json
+
+Reports sessions and model turns per second, mean time per tool call and
+per model call (from telemetry spans), and Python memory growth across the
+run measured with tracemalloc. No network access is needed.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from google.genai import types
+
+import telemetry
+from async_agent import run_agent
+from fake_gemini import DEFAULT_FIXTURE, ScriptedClient
+from main import call_generate_content
+
+
+def run_sync_session(fixture, latency, prompt, prefetch=False):
+    client = ScriptedClient.from_fixture(fixture, latency)
+    messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    call_generate_content(client, messages, False, prefetch=prefetch)
+    return client.position
+
+
+async def run_async_sessions(fixture, latency, prompt, sessions, concurrency, prefetch=False):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            client = ScriptedClient.from_fixture(fixture, latency)
+            await run_agent(client, prompt, prefetch=prefetch)
+            return client.position
+
+    return await asyncio.gather(*(one() for _ in range(sessions)))
+
+
+def run(args):
+    prompt = "how does the calculator render results to the console?"
+    if args.mode == "async":
+        return asyncio.run(
+            run_async_sessions(
+                args.fixture, args.latency, prompt, args.sessions, args.concurrency,
+                args.prefetch,
+            )
+        )
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        return list(
+            executor.map(
+                lambda _: run_sync_session(args.fixture, args.latency, prompt, args.prefetch),
+                range(args.sessions),
+            )
+        )
+
+
+def report(args, elapsed, turns, tracer, memory):
+    current, peak, baseline = memory
+    print(f"fixture:        {os.path.basename(args.fixture)}")
+    print(f"mode:           {args.mode} (concurrency {args.concurrency})")
+    print(f"sessions:       {args.sessions} in {elapsed:.3f}s "
+          f"({args.sessions / elapsed:.1f} sessions/s)")
+    print(f"model turns:    {sum(turns)} ({sum(turns) / elapsed:.1f} turns/s)")
+    print(f"memory growth:  {(current - baseline) / 1024:.1f} KiB retained, "
+          f"{(peak - baseline) / 1024:.1f} KiB peak, "
+          f"{(current - baseline) / args.sessions:.0f} B/session retained")
+    print()
+    tracer.print_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop offline")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mode", choices=("sync", "async"), default="async")
+    parser.add_argument(
+        "--latency", type=float, default=None,
+        help="Simulated model latency in seconds (default: the fixture's)",
+    )
+    parser.add_argument(
+        "--prefetch", action="store_true",
+        help="Warm listed files in the background in every session",
+    )
+    args = parser.parse_args()
+
+    # Warm up imports and the fixture cache outside the measurement.
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_sync_session(args.fixture, 0.0, "warm up")
+
+    tracer = telemetry.enable_tracing()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        turns = run(args)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(args, elapsed, turns, tracer, (current, peak, baseline))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
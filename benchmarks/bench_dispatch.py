@@ -0,0 +1,115 @@
+"""Per-call overhead of tool dispatch and request config.
+
+    python -m benchmarks.bench_dispatch [--calls 20000]
+
+Registers a no-op tool and compares calling it directly with going through
+call_function (lookup, compiled argument validation, span, response
+wrapping), against the old style of building a name -> function map per
+call. Also times building GenerateContentConfig per request against the
+cached one, and the ResponseCache key for each.
+"""
+
+import argparse
+import contextlib
+import time
+
+from google.genai import types
+
+from call_function import call_function, get_generate_config
+from functions.registry import get_tool, tool
+from prompts import system_prompt
+from response_cache import ResponseCache
+
+
+@tool(
+    description="Does nothing.",
+    parameters={
+        "path": {"type": "STRING"},
+        "count": {"type": "INTEGER"},
+    },
+    required=["path"],
+    read_only=True,
+    path_arg="path",
+)
+def noop(working_directory, path, count=1):
+    return path
+
+
+class NullWriter:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def per_call_us(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def legacy_dispatch(part):
+    # What dispatch cost before the registry: a fresh map and no validation.
+    function_map = {"noop": noop, "get_files_info": print, "get_file_content": print,
+                    "run_python_file": print, "write_file": print}
+    args = dict(part.args)
+    args["working_directory"] = "."
+    return function_map[part.name](**args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    calls = args.calls
+
+    part = types.FunctionCall(name="noop", args={"path": "a.txt", "count": 2.0})
+    direct = per_call_us(lambda: noop(".", "a.txt", 2), calls)
+    legacy = per_call_us(lambda: legacy_dispatch(part), calls)
+    with contextlib.redirect_stdout(NullWriter()):
+        dispatched = per_call_us(lambda: call_function(part), calls)
+    print(f"direct call:                     {direct:8.2f} us")
+    print(f"per-call map, no validation:     {legacy:8.2f} us")
+    print(f"call_function (registry):        {dispatched:8.2f} us")
+
+    # The response wrapping is the same for any dispatcher; show it apart.
+    wrap = per_call_us(
+        lambda: types.Part.from_function_response(name="noop", response={"result": "a.txt"}),
+        calls,
+    )
+    validate = per_call_us(lambda: get_tool("noop").validate(part.args), calls)
+    print(f"  of which response wrapping:    {wrap:8.2f} us")
+    print(f"  of which argument validation:  {validate:8.2f} us")
+
+    config_calls = max(1, calls // 10)
+    fresh = per_call_us(
+        lambda: types.GenerateContentConfig(
+            tools=[get_generate_config().tools[0]], system_instruction=system_prompt
+        ),
+        config_calls,
+    )
+    cached = per_call_us(get_generate_config, config_calls)
+    print(f"GenerateContentConfig per call:  {fresh:8.2f} us")
+    print(f"cached config:                   {cached:8.2f} us")
+
+    cache_ = ResponseCache(mode="bypass")
+    contents = [types.Content(role="user", parts=[types.Part(text="hello")])]
+    fresh_key = per_call_us(
+        lambda: cache_.key(
+            "m",
+            contents,
+            types.GenerateContentConfig(
+                tools=[get_generate_config().tools[0]], system_instruction=system_prompt
+            ),
+        ),
+        config_calls,
+    )
+    cached_key = per_call_us(lambda: cache_.key("m", contents, get_generate_config()), config_calls)
+    print(f"cache key, fresh config:         {fresh_key:8.2f} us")
+    print(f"cache key, cached config:        {cached_key:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
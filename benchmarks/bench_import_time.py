@@ -0,0 +1,85 @@
+"""Cold-start benchmark for the CLI; exits non-zero past the budget.
+
+    python -m benchmarks.bench_import_time [--budget-ms 150] [--runs 10]
+
+Measures the cumulative `-X importtime` cost of `import main`, the wall
+time of `python main.py --help` above a bare interpreter start, and checks
+that neither pulls in the google.genai SDK.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+from config import STARTUP_BUDGET_MS
+
+HEAVY_MODULES = ("google.genai", "httpx", "pydantic", "asyncio")
+
+
+def best_wall_ms(args, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def import_time_ms(module, runs):
+    # Cumulative microseconds reported for the top-level module; best of N.
+    best = float("inf")
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module and not fields[2].startswith("  "):
+                best = min(best, int(fields[1]) / 1000)
+    return best
+
+
+def heavy_imports(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start time")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = best_wall_ms([sys.executable, "-c", "pass"], args.runs)
+    help_ms = best_wall_ms([sys.executable, "main.py", "--help"], args.runs) - baseline
+    import_ms = import_time_ms("main", args.runs)
+    loaded = heavy_imports("main")
+
+    print(f"interpreter startup:      {baseline:8.1f} ms")
+    print(f"import main (importtime): {import_ms:8.1f} ms")
+    print(f"main.py --help overhead:  {help_ms:8.1f} ms")
+    print(f"heavy modules imported:   {' '.join(loaded) or 'none'}")
+    print(f"budget:                   {args.budget_ms:8.1f} ms")
+
+    failures = []
+    if max(import_ms, help_ms) > args.budget_ms:
+        failures.append(f"cold start {max(import_ms, help_ms):.1f} ms exceeds budget")
+    if loaded:
+        failures.append(f"imported eagerly: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
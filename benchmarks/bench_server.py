@@ -0,0 +1,169 @@
+"""Load test of server.py against the scripted fake client.
+
+    python -m benchmarks.bench_server --sessions 500 --concurrency 64
+    python -m benchmarks.bench_server --unix /tmp/agent.sock   # a running server
+
+Starts the server in a subprocess on a temporary Unix socket (unless
+--unix points at one already running), opens --concurrency connections at
+a time until --sessions sessions have been requested, and reads each
+event stream to the end. Reports sessions per second, time to the
+"accepted" event and to the end of the stream, how sessions ended, and
+requests turned away with 503. --cli N also times N sessions run as a
+fresh `python` process each, for comparison with the CLI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_gemini import DEFAULT_FIXTURE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI_SESSION = """
+import contextlib, io, sys
+from google.genai import types
+from fake_gemini import ScriptedClient
+from main import call_generate_content
+client = ScriptedClient.from_fixture(sys.argv[1], float(sys.argv[2]))
+messages = [types.Content(role="user", parts=[types.Part(text="load test")])]
+with contextlib.redirect_stdout(io.StringIO()):
+    call_generate_content(client, messages, False)
+"""
+
+
+async def run_session(unix_path, body):
+    """Return (status, seconds to "accepted", seconds to the end)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_unix_connection(unix_path)
+    request = (
+        "POST /sessions HTTP/1.1\r\nHost: agent\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    writer.write(request)
+    await writer.drain()
+    status_line = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    code = int(status_line.split()[1])
+    accepted = None
+    status = f"http_{code}"
+    if code == 200:
+        async for line in reader:
+            event = json.loads(line)
+            if event["event"] == "accepted":
+                accepted = time.perf_counter() - start
+            elif event["event"] == "end":
+                status = event["status"]
+    else:
+        await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return status, accepted, time.perf_counter() - start
+
+
+async def load(unix_path, sessions, concurrency, body):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            try:
+                return await run_session(unix_path, body)
+            except OSError as e:
+                return type(e).__name__, None, 0.0
+
+    return await asyncio.gather(*(one() for _ in range(sessions)))
+
+
+async def fetch_status(unix_path):
+    reader, writer = await asyncio.open_unix_connection(unix_path)
+    writer.write(b"GET /status HTTP/1.1\r\nHost: agent\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def start_server(args, unix_path):
+    command = [
+        sys.executable, "server.py", "--unix", unix_path, "--fake", args.fixture,
+        "--latency", str(args.latency), "--max-sessions", str(args.max_sessions),
+        "--max-queued", str(args.max_queued),
+    ]
+    server = subprocess.Popen(command, cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(unix_path):
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def time_cli(args):
+    start = time.perf_counter()
+    for _ in range(args.cli):
+        subprocess.run(
+            [sys.executable, "-c", CLI_SESSION, args.fixture, str(args.latency)],
+            cwd=ROOT,
+            check=True,
+        )
+    return (time.perf_counter() - start) / args.cli
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated model latency")
+    parser.add_argument("--max-sessions", type=int, default=16)
+    parser.add_argument("--max-queued", type=int, default=64)
+    parser.add_argument("--unix", metavar="PATH", help="Load an already running server")
+    parser.add_argument("--cli", type=int, default=0, metavar="N", help="Also time N CLI processes")
+    args = parser.parse_args()
+
+    body = json.dumps({"prompt": "load test"}).encode()
+    with tempfile.TemporaryDirectory() as tmp:
+        unix_path = args.unix or os.path.join(tmp, "agent.sock")
+        server = None if args.unix else start_server(args, unix_path)
+        try:
+            start = time.perf_counter()
+            results = asyncio.run(load(unix_path, args.sessions, args.concurrency, body))
+            elapsed = time.perf_counter() - start
+            status = asyncio.run(fetch_status(unix_path))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    counts = {}
+    for result_status, _, _ in results:
+        counts[result_status] = counts.get(result_status, 0) + 1
+    accepted = [seconds for _, seconds, _ in results if seconds is not None]
+    total = [seconds for result_status, _, seconds in results if result_status == "done"]
+    print(f"sessions:        {args.sessions} requested in {elapsed:.3f}s, "
+          f"{len(total) / elapsed:.1f} completed sessions/s "
+          f"(concurrency {args.concurrency}, server slots {status['limits']['max_sessions']})")
+    print(f"outcomes:        {', '.join(f'{name}={count}' for name, count in sorted(counts.items()))}")
+    print(f"to accepted:     p50 {percentile(accepted, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(accepted, 0.95) * 1000:.1f} ms")
+    print(f"to end:          p50 {percentile(total, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(total, 0.95) * 1000:.1f} ms, max {max(total, default=0) * 1000:.1f} ms")
+    print(f"server status:   {json.dumps(status['finished'])}, rejected {status['rejected']}")
+    if args.cli:
+        per_session = time_cli(args)
+        print(f"CLI process:     {per_session * 1000:.1f} ms per session "
+              f"({1 / per_session:.1f} sessions/s, one at a time)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
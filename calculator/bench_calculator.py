@@ -0,0 +1,114 @@
+# calculator/bench_calculator.py
+
+import random
+import sys
+import timeit
+
+from pkg.calculator import Calculator, compile_expression
+
+
+class LegacyCalculator:
+    """The interpreter Calculator replaced, kept as the benchmark baseline."""
+
+    def __init__(self):
+        self.operators = {
+            "+": lambda a, b: a + b,
+            "-": lambda a, b: a - b,
+            "*": lambda a, b: a * b,
+            "/": lambda a, b: a / b,
+        }
+        self.precedence = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+    def evaluate(self, expression):
+        if not expression or expression.isspace():
+            return None
+        values = []
+        operators = []
+        for token in expression.strip().split():
+            if token in self.operators:
+                while (
+                    operators
+                    and self.precedence[operators[-1]] >= self.precedence[token]
+                ):
+                    self._apply_operator(operators, values)
+                operators.append(token)
+            else:
+                values.append(float(token))
+        while operators:
+            self._apply_operator(operators, values)
+        return values[0]
+
+    def _apply_operator(self, operators, values):
+        operator = operators.pop()
+        b = values.pop()
+        a = values.pop()
+        values.append(self.operators[operator](a, b))
+
+
+def random_expression(rng, terms):
+    parts = [str(rng.randint(1, 99))]
+    for _ in range(terms - 1):
+        parts.append(rng.choice("+-*/"))
+        parts.append(str(rng.randint(1, 99)))
+    return " ".join(parts)
+
+
+def bench(label, calculator, expressions, number):
+    evaluate = calculator.evaluate
+
+    def run():
+        for expression in expressions:
+            evaluate(expression)
+
+    seconds = min(timeit.repeat(run, number=number, repeat=5)) / number
+    per_eval = seconds / len(expressions) * 1e6
+    print(f"{label:<34} {per_eval:8.2f} us/eval")
+    return per_eval
+
+
+def main():
+    rng = random.Random(1234)
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    repeated = [random_expression(rng, terms) for _ in range(100)]
+    unique = [random_expression(rng, terms) for _ in range(5000)]
+
+    print(f"expressions with {terms} terms")
+    legacy = LegacyCalculator()
+    calculator = Calculator()
+    for label, expressions, number in (
+        ("repeated (100 distinct)", repeated, 200),
+        ("unique (no cache hits)", unique, 1),
+    ):
+        compile_expression.cache_clear()
+        before = bench(f"legacy, {label}", legacy, expressions, number)
+        after = bench(f"compiled, {label}", calculator, expressions, number)
+        print(f"{'speedup':<34} {before / after:8.2f}x")
+    bench_columns(calculator)
+
+
+def bench_columns(calculator, rows=100_000):
+    rng = random.Random(99)
+    columns = {
+        "x": [rng.uniform(-100, 100) for _ in range(rows)],
+        "y": [rng.uniform(-100, 100) for _ in range(rows)],
+    }
+    expression = "(x + 1) * y - x / 3"
+    rows_of_bindings = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def per_row():
+        for bindings in rows_of_bindings:
+            calculator.evaluate(expression, bindings)
+
+    def vectorized():
+        calculator.evaluate_columns(expression, columns)
+
+    before = min(timeit.repeat(per_row, number=1, repeat=3)) / rows * 1e9
+    after = min(timeit.repeat(vectorized, number=1, repeat=3)) / rows * 1e9
+    print(f"{rows} rows of {expression!r}")
+    print(f"{'per-row evaluate':<34} {before:8.1f} ns/row")
+    print(f"{'evaluate_columns':<34} {after:8.1f} ns/row")
+    print(f"{'speedup':<34} {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
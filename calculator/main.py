@@ -1,5 +1,6 @@
 # calculator/main.py
 
+import os
 import sys
 from pkg.calculator import Calculator
 from pkg.render import format_json_output
@@ -11,6 +12,16 @@ def main():
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
         print('Example: python main.py "3 + 5"')
+        print('CSV mode: python main.py --csv <input.csv> "<expression>" [--output <out.csv>]')
+        print("Stream mode: python main.py --stream [<file>] (one expression per line, NDJSON out)")
+        return
+
+    if sys.argv[1] == "--csv":
+        run_csv(sys.argv[2:])
+        return
+
+    if sys.argv[1] == "--stream":
+        run_stream(calculator, sys.argv[2:])
         return
 
     expression = " ".join(sys.argv[1:])
@@ -25,5 +36,59 @@ def main():
         print(f"Error: {e}")
 
 
+def run_csv(args):
+    from pkg.vectorized import evaluate_csv
+
+    output = None
+    if "--output" in args:
+        index = args.index("--output")
+        output = args[index + 1] if index + 1 < len(args) else None
+        args = args[:index] + args[index + 2 :]
+        if output is None:
+            print("Error: --output needs a file name.")
+            return
+    if len(args) < 2:
+        print('Usage: python main.py --csv <input.csv> "<expression>" [--output <out.csv>]')
+        return
+
+    path, expression = args[0], " ".join(args[1:])
+    try:
+        with open(path, newline="") as infile:
+            if output is None:
+                evaluate_csv(expression, infile, sys.stdout)
+            else:
+                # Write next to the output and rename, so an error part way
+                # through leaves no half-written file behind.
+                partial = f"{output}.partial"
+                try:
+                    with open(partial, "w", newline="") as outfile:
+                        rows = evaluate_csv(expression, infile, outfile)
+                    os.replace(partial, output)
+                finally:
+                    if os.path.exists(partial):
+                        os.remove(partial)
+                print(f"Wrote {rows} rows to {output}")
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+def run_stream(calculator, args):
+    from pkg.stream import evaluate_stream
+
+    path = args[0] if args else "-"
+    try:
+        if path == "-":
+            evaluate_stream(calculator, sys.stdin, sys.stdout)
+        else:
+            with open(path) as infile:
+                evaluate_stream(calculator, infile, sys.stdout)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly, and point
+        # stdout at devnull so the flush at exit does not raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except Exception as e:
+        print(f"Error: {e}")
+
+
 if __name__ == "__main__":
     main()
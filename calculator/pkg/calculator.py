@@ -1,62 +1,230 @@
 # calculator/pkg/calculator.py
 
+import re
+from functools import lru_cache
 
-class Calculator:
-    def __init__(self):
-        self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
-        }
-        self.precedence = {
-            "+": 1,
-            "-": 1,
-            "*": 2,
-            "/": 2,
-        }
-
-    def evaluate(self, expression):
-        if not expression or expression.isspace():
-            return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
-
-    def _evaluate_infix(self, tokens):
-        values = []
-        operators = []
-
-        for token in tokens:
-            if token in self.operators:
-                while (
-                    operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
+COMPILE_CACHE_SIZE = 1024
+
+# Opcodes of the compiled postfix form. PUSH carries a float operand and
+# LOAD the name of a variable.
+PUSH, ADD, SUB, MUL, DIV, NEG, LOAD = range(7)
+
+BINARY_OPERATORS = {"+": ADD, "-": SUB, "*": MUL, "/": DIV}
+PRECEDENCE = {ADD: 1, SUB: 1, MUL: 2, DIV: 2, NEG: 3}
+SYMBOLS = {ADD: "+", SUB: "-", MUL: "*", DIV: "/", NEG: "-"}
+
+# Each match is (leading whitespace, token). Numbers, names and single
+# symbols are told apart by their first character.
+TOKEN_RE = re.compile(r"(\s*)((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[A-Za-z_]\w*|\S)")
+OPERAND_START = set("0123456789.abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+SYMBOL_TOKENS = set("+-*/()")
+
+
+def tokenize(expression):
+    """Return (tokens, glued) where glued[i] says tokens[i] had no space before it.
+
+    Space-separated input, the common case, is handled by str.split alone;
+    glued is then None since every token is preceded by whitespace.
+    """
+    tokens = expression.split()
+    for token in tokens:
+        if token not in SYMBOL_TOKENS and not token.replace(".", "", 1).isdigit():
+            break
+    else:
+        return tokens, None
+    matches = TOKEN_RE.findall(expression)
+    if "".join(ws + token for ws, token in matches) != expression.rstrip():
+        raise ValueError("invalid expression")
+    return [token for _, token in matches], [not ws for ws, _ in matches]
+
+
+def _operand(token):
+    # Names float() understands ("inf", "nan") are constants; any other
+    # name is a variable.
+    try:
+        return PUSH, float(token)
+    except ValueError:
+        if token[0].isdigit() or token[0] == ".":
+            raise ValueError(f"invalid token: {token}")
+        return LOAD, token
+
+
+def _out_of_place(tokens, glued, index):
+    # A token where the other kind was expected. Glued to its neighbours it
+    # is part of a malformed word such as "1.2.3" or "2(3)", reported whole
+    # as the word-at-a-time parser did; on its own it is a missing operator.
+    if not glued or not (glued[index] or (index + 1 < len(tokens) and glued[index + 1])):
+        return ValueError("invalid expression")
+    start = index
+    while start > 0 and glued[start]:
+        start -= 1
+    end = index + 1
+    while end < len(tokens) and glued[end]:
+        end += 1
+    return ValueError(f"invalid token: {''.join(tokens[start:end])}")
+
+
+def _not_enough_operands(op):
+    return ValueError(f"not enough operands for operator {SYMBOLS[op]}")
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(expression):
+    """Compile an infix expression into a tuple of (opcode, operand) pairs.
+
+    Uses the shunting-yard algorithm. Operands and binary operators must
+    alternate and stack depth is checked here, so the compiled code can be
+    run without any further validation, and constant subexpressions are
+    folded.
+    """
+    tokens, glued = tokenize(expression)
+    code = []
+    append = code.append
+    operators = []
+    depth = 0
+    expect_operand = True
+
+    for index, token in enumerate(tokens):
+        if token[0] in OPERAND_START:
+            if not expect_operand:
+                raise _out_of_place(tokens, glued, index)
+            append(_operand(token))
+            depth += 1
+            expect_operand = False
+            continue
+        op = BINARY_OPERATORS.get(token)
+        if op is not None:
+            if expect_operand:
+                if op == SUB:
+                    # Unary minus binds tighter than any binary operator and
+                    # is right-associative, so nothing is popped for it.
+                    operators.append(NEG)
+                    continue
+                if (
+                    op == ADD
+                    and glued
+                    and index + 1 < len(tokens)
+                    and glued[index + 1]
+                    and tokens[index + 1][0].isdigit()
                 ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
+                    # "+3" is a signed number, as float() would read it.
+                    continue
+                raise _not_enough_operands(op)
+            precedence = PRECEDENCE[op]
+            while (
+                operators
+                and operators[-1] != "("
+                and PRECEDENCE[operators[-1]] >= precedence
+            ):
+                depth = _emit(code, operators.pop(), depth)
+            operators.append(op)
+            expect_operand = True
+        elif token == "(":
+            if not expect_operand:
+                raise _out_of_place(tokens, glued, index)
+            operators.append("(")
+            expect_operand = True
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                depth = _emit(code, operators.pop(), depth)
+            if not operators:
+                raise ValueError("mismatched parentheses")
+            operators.pop()
+            expect_operand = False
+        else:
+            raise ValueError(f"invalid token: {token}")
+
+    while operators:
+        op = operators.pop()
+        if op == "(":
+            raise ValueError("mismatched parentheses")
+        depth = _emit(code, op, depth)
+
+    if depth != 1:
+        raise ValueError("invalid expression")
+    return tuple(code)
+
+
+def _emit(code, op, depth):
+    # Operators whose operands are all constants are folded into a single
+    # PUSH, unless evaluating them raises (division by zero is left to fail
+    # at evaluation time, as before).
+    if op == NEG:
+        if depth < 1:
+            raise _not_enough_operands(op)
+        if code[-1][0] == PUSH:
+            code[-1] = (PUSH, -code[-1][1])
+            return depth
+    else:
+        if depth < 2:
+            raise _not_enough_operands(op)
+        depth -= 1
+        if code[-1][0] == PUSH and code[-2][0] == PUSH:
+            a = code[-2][1]
+            b = code[-1][1]
+            try:
+                if op == ADD:
+                    value = a + b
+                elif op == SUB:
+                    value = a - b
+                elif op == MUL:
+                    value = a * b
+                else:
+                    value = a / b
+            except ArithmeticError:
+                pass
             else:
-                try:
-                    values.append(float(token))
-                except ValueError:
-                    raise ValueError(f"invalid token: {token}")
+                del code[-1]
+                code[-1] = (PUSH, value)
+                return depth
+    code.append((op, None))
+    return depth
+
 
-        while operators:
-            self._apply_operator(operators, values)
+def run(code, bindings=None):
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for op, value in code:
+        if op == PUSH:
+            push(value)
+        elif op == ADD:
+            b = pop()
+            stack[-1] += b
+        elif op == SUB:
+            b = pop()
+            stack[-1] -= b
+        elif op == MUL:
+            b = pop()
+            stack[-1] *= b
+        elif op == DIV:
+            b = pop()
+            stack[-1] /= b
+        elif op == NEG:
+            stack[-1] = -stack[-1]
+        else:
+            try:
+                push(float(bindings[value]))
+            except (KeyError, TypeError):
+                raise ValueError(f"invalid token: {value}")
+    return stack[0]
 
-        if len(values) != 1:
-            raise ValueError("invalid expression")
 
-        return values[0]
+class Calculator:
+    def evaluate(self, expression, variables=None):
+        if not expression or expression.isspace():
+            return None
+        code = compile_expression(expression.strip())
+        if len(code) == 1 and code[0][0] == PUSH:
+            return code[0][1]
+        return run(code, variables)
 
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
+    def evaluate_columns(self, expression, columns):
+        """Evaluate expression once per row of columns (name -> sequence).
 
-        operator = operators.pop()
-        if len(values) < 2:
-            raise ValueError(f"not enough operands for operator {operator}")
+        Operators are applied a whole column at a time (with NumPy when it
+        is installed), so there is no per-row interpreter loop.
+        """
+        from pkg.vectorized import run_columns
 
-        b = values.pop()
-        a = values.pop()
-        values.append(self.operators[operator](a, b))
+        return run_columns(compile_expression(expression.strip()), columns)
@@ -2,6 +2,21 @@
 
 import json
 
+encode_string = json.encoder.encode_basestring
+
+
+def _encode_number(result) -> str:
+    # Same spellings json.dumps uses, without building a dict per record.
+    if isinstance(result, int):
+        return str(result)
+    if result != result:
+        return "NaN"
+    if result == float("inf"):
+        return "Infinity"
+    if result == float("-inf"):
+        return "-Infinity"
+    return repr(result)
+
 
 def format_json_output(expression: str, result: float, indent: int = 2) -> str:
     if isinstance(result, float) and result.is_integer():
@@ -9,8 +24,18 @@ def format_json_output(expression: str, result: float, indent: int = 2) -> str:
     else:
         result_to_dump = result
 
+    if indent is None:
+        return (
+            '{"expression":' + encode_string(expression)
+            + ',"result":' + _encode_number(result_to_dump) + "}"
+        )
+
     output_data = {
         "expression": expression,
         "result": result_to_dump,
     }
     return json.dumps(output_data, indent=indent)
+
+
+def format_json_error(expression: str, error: str) -> str:
+    return '{"expression":' + encode_string(expression) + ',"error":' + encode_string(error) + "}"
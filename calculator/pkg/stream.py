@@ -0,0 +1,46 @@
+# calculator/pkg/stream.py
+
+from pkg.render import format_json_error, format_json_output
+
+STREAM_CHUNK_LINES = 4096
+
+
+def evaluate_stream(calculator, infile, outfile, chunk_lines=STREAM_CHUNK_LINES):
+    """Evaluate one expression per input line and write one NDJSON record per line.
+
+    Lines that fail to evaluate produce an error record instead of stopping
+    the stream. Output is written and flushed every chunk_lines records, so
+    memory stays bounded however long the input is. Returns (records, errors).
+    """
+    evaluate = calculator.evaluate
+    buffer = []
+    append = buffer.append
+    records = 0
+    errors = 0
+    for line in infile:
+        expression = line.strip()
+        try:
+            result = evaluate(expression)
+        except Exception as e:
+            result = None
+            error = str(e)
+        else:
+            error = "Expression is empty or contains only whitespace."
+        if result is None:
+            append(format_json_error(expression, error))
+            errors += 1
+        else:
+            append(format_json_output(expression, result, indent=None))
+        records += 1
+        if len(buffer) >= chunk_lines:
+            _flush(buffer, outfile)
+    _flush(buffer, outfile)
+    return records, errors
+
+
+def _flush(buffer, outfile):
+    if buffer:
+        buffer.append("")
+        outfile.write("\n".join(buffer))
+        outfile.flush()
+        buffer.clear()
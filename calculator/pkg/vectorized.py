@@ -0,0 +1,194 @@
+# calculator/pkg/vectorized.py
+
+import csv
+import math
+import operator
+
+from pkg.calculator import ADD, DIV, LOAD, MUL, NEG, PUSH, SUB, compile_expression
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CSV_CHUNK_ROWS = 65536
+
+
+def _divide(a, b):
+    # Match NumPy's IEEE semantics so both backends agree on x / 0.
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+LIST_OPERATORS = {ADD: operator.add, SUB: operator.sub, MUL: operator.mul, DIV: _divide}
+
+
+def _column(columns, name):
+    try:
+        values = columns[name]
+    except KeyError:
+        raise ValueError(f"invalid token: {name}")
+    if np is not None:
+        return np.asarray(values, dtype=np.float64)
+    return [float(value) for value in values]
+
+
+def _row_count(columns):
+    for values in columns.values():
+        return len(values)
+    return 1
+
+
+def _run_numpy(code, columns):
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for op, value in code:
+            if op == PUSH:
+                push(value)
+            elif op == LOAD:
+                push(_column(columns, value))
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            else:
+                # Not in place: a LOAD may hand us the caller's own array.
+                b = pop()
+                a = stack[-1]
+                if op == ADD:
+                    stack[-1] = a + b
+                elif op == SUB:
+                    stack[-1] = a - b
+                elif op == MUL:
+                    stack[-1] = a * b
+                else:
+                    stack[-1] = np.true_divide(a, b)
+    result = stack[0]
+    if np.ndim(result) == 0:
+        result = np.full(_row_count(columns), result, dtype=np.float64)
+    return result
+
+
+def _run_lists(code, columns):
+    # Each stack entry is (is_column, value); scalar-scalar operations are
+    # only left over after folding when a division by zero was deferred.
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for op, value in code:
+        if op == PUSH:
+            push((False, value))
+        elif op == LOAD:
+            push((True, _column(columns, value)))
+        elif op == NEG:
+            is_column, a = stack[-1]
+            stack[-1] = (is_column, [-x for x in a] if is_column else -a)
+        else:
+            function = LIST_OPERATORS[op]
+            b_column, b = pop()
+            a_column, a = stack[-1]
+            if a_column and b_column:
+                stack[-1] = (True, list(map(function, a, b)))
+            elif a_column:
+                stack[-1] = (True, [function(x, b) for x in a])
+            elif b_column:
+                stack[-1] = (True, [function(a, y) for y in b])
+            else:
+                stack[-1] = (False, function(a, b))
+    is_column, result = stack[0]
+    if not is_column:
+        result = [result] * _row_count(columns)
+    return result
+
+
+def run_columns(code, columns):
+    """Run compiled code over columns, a mapping of name -> equal-length sequence.
+
+    Returns a NumPy array when NumPy is installed, otherwise a list of floats.
+    Division by zero gives inf/nan per row instead of raising.
+    """
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("columns have different lengths")
+    if np is not None:
+        return _run_numpy(code, columns)
+    return _run_lists(code, columns)
+
+
+def evaluate_csv(expression, infile, outfile, result_column="result", chunk_rows=CSV_CHUNK_ROWS):
+    """Append a result column to a CSV file whose header names the variables.
+
+    Rows are read and evaluated chunk_rows at a time so memory stays bounded.
+    Blank lines are skipped. A row with the wrong number of fields or a
+    value that is not a number raises ValueError naming its line, before
+    any of that row's chunk is written. Returns the number of rows written.
+    """
+    code = compile_expression(expression.strip())
+    reader = csv.reader(infile)
+    writer = csv.writer(outfile)
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ValueError("CSV input has no header row")
+    needed = {value for op, value in code if op == LOAD}
+    indexes = {name: index for index, name in enumerate(header) if name in needed}
+    for name in needed:
+        if name not in indexes:
+            raise ValueError(f"invalid token: {name}")
+    writer.writerow(header + [result_column])
+
+    width = len(header)
+    total = 0
+    chunk = []
+    lines = []
+    for row in reader:
+        if not "".join(row).strip():
+            continue
+        if len(row) != width:
+            raise ValueError(f"line {reader.line_num}: expected {width} fields, got {len(row)}")
+        chunk.append(row)
+        lines.append(reader.line_num)
+        if len(chunk) >= chunk_rows:
+            total += _write_chunk(code, chunk, lines, indexes, writer)
+            chunk = []
+            lines = []
+    if chunk:
+        total += _write_chunk(code, chunk, lines, indexes, writer)
+    return total
+
+
+def _parse_column(rows, lines, index, name):
+    values = [row[index] for row in rows]
+    try:
+        return list(map(float, values))
+    except ValueError:
+        # Only look for the offending row once we know there is one.
+        for value, line in zip(values, lines):
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError(f"line {line}: invalid number for {name}: {value!r}") from None
+        raise
+
+
+def _write_chunk(code, rows, lines, indexes, writer):
+    bindings = {name: _parse_column(rows, lines, index, name) for name, index in indexes.items()}
+    if not bindings:
+        # Constant expression: there is no column to take the length from.
+        results = [float(run_columns(code, {})[0])] * len(rows)
+    else:
+        results = run_columns(code, bindings)
+        if np is not None:
+            results = results.tolist()
+    writer.writerows(row + [_format(value)] for row, value in zip(rows, results))
+    return len(rows)
+
+
+def _format(value):
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
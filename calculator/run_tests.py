@@ -0,0 +1,344 @@
+# calculator/run_tests.py
+#
+# Parallel test runner for the calculator. Runs tests.py plus a table-driven
+# corpus and thousands of generated expressions checked against a reference
+# evaluator built on Python's own parser, spread over a process pool, and
+# prints a compact summary with per-test and per-shard timings.
+#
+# Usage: python run_tests.py [--cases N] [--workers N] [--seed N] [--timeout S]
+
+import ast
+import io
+import math
+import multiprocessing
+import operator
+import os
+import random
+import sys
+import time
+import unittest
+
+from pkg.calculator import Calculator
+
+DEFAULT_CASES = 4000
+SHARD_SIZE = 500
+DEFAULT_TIMEOUT = 25.0
+MAX_FAILURES_SHOWN = 5
+VARIABLE_NAMES = ("x", "y", "z")
+
+# (expression, expected result or the exception type evaluate should raise)
+TABLE = [
+    ("3 + 5", 8),
+    ("10 - 4", 6),
+    ("3 * 4", 12),
+    ("10 / 4", 2.5),
+    ("2 * 3 - 8 / 2 + 5", 7),
+    ("10 - 4 - 3", 3),
+    ("2 * (3 + 4)", 14),
+    ("-(2 + 3) * -2", 10),
+    ("2*3-8/2+5", 7),
+    ("2*+3", 6),
+    ("--3", 3),
+    (".5 + 1.25", 1.75),
+    ("1e3 / 8", 125),
+    ("((((1))))", 1),
+    ("", None),
+    ("   ", None),
+    ("$ 3 5", ValueError),
+    ("+ 3", ValueError),
+    ("3 +", ValueError),
+    ("3 5", ValueError),
+    ("(3 + 5", ValueError),
+    ("3 + 5)", ValueError),
+    ("()", ValueError),
+    ("1abc", ValueError),
+    ("1.2.3 *", ValueError),
+    ("1..2 +", ValueError),
+    ("3.0.1 +", ValueError),
+    ("2(3)*", ValueError),
+    ("3 5 +", ValueError),
+    ("3 * * 4", ValueError),
+    ("x * 2", ValueError),
+    ("2 / 0", ZeroDivisionError),
+    ("1 / (3 - 3)", ZeroDivisionError),
+]
+
+REFERENCE_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+def reference_evaluate(expression, variables=None):
+    """Evaluate expression with Python's parser and float arithmetic."""
+    return _reference(ast.parse(expression, mode="eval").body, variables or {})
+
+
+def _reference(node, variables):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return float(variables[node.id])
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_reference(node.operand, variables)
+    if isinstance(node, ast.BinOp) and type(node.op) in REFERENCE_OPERATORS:
+        left = _reference(node.left, variables)
+        right = _reference(node.right, variables)
+        return REFERENCE_OPERATORS[type(node.op)](left, right)
+    raise ValueError(f"unsupported syntax: {ast.dump(node)}")
+
+
+def random_number(rng):
+    kind = rng.random()
+    if kind < 0.6:
+        return str(rng.randint(0, 99))
+    if kind < 0.9:
+        return f"{rng.randint(0, 99)}.{rng.randint(0, 99)}"
+    return f".{rng.randint(1, 99)}"
+
+
+def random_tokens(rng, depth, variables=False):
+    """Return a random well-formed expression as a list of tokens.
+
+    Parentheses are added at random, so the string does not have to mean
+    what the tree did; both evaluators parse the same text.
+    """
+    if depth == 0 or rng.random() < 0.25:
+        if variables and rng.random() < 0.4:
+            return [rng.choice(VARIABLE_NAMES)]
+        return [random_number(rng)]
+    if rng.random() < 0.1:
+        return ["-"] + random_tokens(rng, depth - 1, variables)
+    left = random_tokens(rng, depth - 1, variables)
+    right = random_tokens(rng, depth - 1, variables)
+    if rng.random() < 0.5:
+        left = ["("] + left + [")"]
+    if rng.random() < 0.5:
+        right = ["("] + right + [")"]
+    return left + [rng.choice("+-*/")] + right
+
+
+def random_bindings(rng):
+    return {name: rng.uniform(-50, 50) for name in VARIABLE_NAMES}
+
+
+def outcome(function, *args):
+    # Results are compared as values; errors by exception type only.
+    try:
+        return function(*args)
+    except (ArithmeticError, ValueError) as e:
+        return type(e)
+
+
+def same_outcome(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+def check_table(rng, count):
+    calculator = Calculator()
+    failures = []
+    for expression, expected in TABLE:
+        got = outcome(calculator.evaluate, expression)
+        if not same_outcome(got, expected):
+            failures.append(f"{expression!r}: expected {expected!r}, got {got!r}")
+    return len(TABLE), failures
+
+
+def check_reference(rng, count):
+    calculator = Calculator()
+    failures = []
+    for _ in range(count):
+        expression = " ".join(random_tokens(rng, rng.randint(1, 6)))
+        expected = outcome(reference_evaluate, expression)
+        got = outcome(calculator.evaluate, expression)
+        if not same_outcome(got, expected):
+            failures.append(f"{expression!r}: expected {expected!r}, got {got!r}")
+    return count, failures
+
+
+def check_variables(rng, count):
+    calculator = Calculator()
+    failures = []
+    for _ in range(count):
+        expression = " ".join(random_tokens(rng, rng.randint(1, 6), variables=True))
+        bindings = random_bindings(rng)
+        expected = outcome(reference_evaluate, expression, bindings)
+        got = outcome(calculator.evaluate, expression, bindings)
+        if not same_outcome(got, expected):
+            failures.append(f"{expression!r} with {bindings}: expected {expected!r}, got {got!r}")
+    return count, failures
+
+
+def check_spacing(rng, count):
+    # Spacing must not change the meaning of an expression.
+    calculator = Calculator()
+    failures = []
+    for _ in range(count):
+        tokens = random_tokens(rng, rng.randint(1, 6))
+        spaced = " ".join(tokens)
+        glued = "".join(token + " " * rng.randint(0, 2) for token in tokens)
+        expected = outcome(calculator.evaluate, spaced)
+        got = outcome(calculator.evaluate, glued)
+        if not same_outcome(got, expected):
+            failures.append(f"{glued!r}: expected {expected!r} as in {spaced!r}, got {got!r}")
+    return count, failures
+
+
+def check_columns(rng, count):
+    # evaluate_columns must agree with per-row evaluate; rows that divide by
+    # zero raise in evaluate and become inf/nan in evaluate_columns.
+    calculator = Calculator()
+    failures = []
+    rows = 20
+    cases = 0
+    while cases < count:
+        expression = " ".join(random_tokens(rng, rng.randint(1, 5), variables=True))
+        bindings = [random_bindings(rng) for _ in range(rows)]
+        columns = {name: [row[name] for row in bindings] for name in VARIABLE_NAMES}
+        results = [float(value) for value in calculator.evaluate_columns(expression, columns)]
+        for row, got in zip(bindings, results):
+            expected = outcome(calculator.evaluate, expression, row)
+            if expected is ZeroDivisionError:
+                ok = math.isinf(got) or math.isnan(got)
+            else:
+                ok = same_outcome(got, expected)
+            if not ok:
+                failures.append(f"{expression!r} with {row}: expected {expected!r}, got {got!r}")
+        cases += rows
+    return cases, failures
+
+
+def check_unittest(rng, count):
+    import tests
+
+    suite = unittest.defaultTestLoader.loadTestsFromModule(tests)
+    result = unittest.TextTestRunner(stream=io.StringIO(), verbosity=0).run(suite)
+    failures = [
+        f"{test.id()}: {trace.strip().splitlines()[-1]}"
+        for test, trace in result.failures + result.errors
+    ]
+    return result.testsRun, failures
+
+
+# name -> (check, scale); scale is the share of --cases the test generates,
+# 0 for fixed-size tests that run as a single shard.
+TESTS = {
+    "unittest": (check_unittest, 0),
+    "table": (check_table, 0),
+    "reference": (check_reference, 1),
+    "variables": (check_variables, 1),
+    "spacing": (check_spacing, 0.5),
+    "columns": (check_columns, 1),
+}
+
+
+def make_shards(cases, seed):
+    shards = []
+    for name, (_, scale) in TESTS.items():
+        total = int(cases * scale)
+        if total == 0:
+            shards.append((name, 0, seed, 0))
+            continue
+        for index, start in enumerate(range(0, total, SHARD_SIZE)):
+            shards.append((name, index, seed, min(SHARD_SIZE, total - start)))
+    return shards
+
+
+def run_shard(shard):
+    name, index, seed, count = shard
+    rng = random.Random(f"{seed}:{name}:{index}")
+    start = time.perf_counter()
+    try:
+        cases, failures = TESTS[name][0](rng, count)
+    except Exception as e:
+        cases, failures = count, [f"shard crashed: {type(e).__name__}: {e}"]
+    return name, index, cases, time.perf_counter() - start, failures
+
+
+def parse_args(argv):
+    options = {"cases": DEFAULT_CASES, "workers": os.cpu_count() or 1, "seed": 0, "timeout": DEFAULT_TIMEOUT}
+    args = list(argv)
+    while args:
+        flag = args.pop(0)
+        key = flag.lstrip("-")
+        if key not in options or not args:
+            raise SystemExit(f"Usage: python run_tests.py [--cases N] [--workers N] [--seed N] [--timeout S] (bad option {flag})")
+        options[key] = type(options[key])(args.pop(0))
+    return options
+
+
+def main(argv):
+    options = parse_args(argv)
+    shards = make_shards(options["cases"], options["seed"])
+    workers = max(1, min(options["workers"], len(shards)))
+    start = time.perf_counter()
+    results = []
+    timed_out = False
+    deadline = start + options["timeout"]
+    # Leaving the with block terminates the workers, so shards still
+    # running after a timeout don't hold up exit past the caller's own.
+    with multiprocessing.Pool(workers) as pool:
+        completed = pool.imap_unordered(run_shard, shards)
+        try:
+            for _ in shards:
+                results.append(completed.next(max(0.0, deadline - time.perf_counter())))
+        except multiprocessing.TimeoutError:
+            timed_out = True
+    wall = time.perf_counter() - start
+    return report(results, len(shards), workers, wall, timed_out)
+
+
+def report(results, shard_count, workers, wall, timed_out):
+    by_test = {}
+    for name, index, cases, elapsed, failures in results:
+        entry = by_test.setdefault(name, {"cases": 0, "failures": [], "shards": 0, "time": 0.0, "slowest": 0.0})
+        entry["cases"] += cases
+        entry["failures"].extend(failures)
+        entry["shards"] += 1
+        entry["time"] += elapsed
+        entry["slowest"] = max(entry["slowest"], elapsed)
+
+    print(f"{'test':<10} {'cases':>7} {'fail':>5} {'shards':>6} {'cpu s':>7} {'max shard s':>11}")
+    total_cases = 0
+    total_failures = 0
+    for name in TESTS:
+        entry = by_test.get(name)
+        if entry is None:
+            print(f"{name:<10} {'-':>7} {'-':>5} {0:>6} {'-':>7} {'-':>11}")
+            continue
+        total_cases += entry["cases"]
+        total_failures += len(entry["failures"])
+        print(
+            f"{name:<10} {entry['cases']:>7} {len(entry['failures']):>5} {entry['shards']:>6}"
+            f" {entry['time']:>7.2f} {entry['slowest']:>11.3f}"
+        )
+
+    times = sorted(elapsed for _, _, _, elapsed, _ in results)
+    if times:
+        print(
+            f"shards: {len(results)}/{shard_count} on {workers} workers,"
+            f" min/median/max {times[0]:.3f}/{times[len(times) // 2]:.3f}/{times[-1]:.3f} s"
+        )
+
+    shown = 0
+    for name, entry in by_test.items():
+        for failure in entry["failures"]:
+            if shown == MAX_FAILURES_SHOWN:
+                break
+            print(f"FAIL {name}: {failure}")
+            shown += 1
+    if total_failures > shown:
+        print(f"... {total_failures - shown} more failures")
+
+    ok = total_failures == 0 and not timed_out
+    status = "OK" if ok else "TIMEOUT" if timed_out else "FAILED"
+    print(f"{status}: {total_cases} cases, {total_failures} failures in {wall:.2f} s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,12 @@
 # calculator/tests.py
 
+import io
+import json
 import unittest
 from pkg.calculator import Calculator
+from pkg.render import format_json_output
+from pkg.stream import evaluate_stream
+from pkg.vectorized import evaluate_csv
 
 
 class TestCalculator(unittest.TestCase):
@@ -40,10 +45,96 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("$ 3 5")
 
+    def test_malformed_numbers(self):
+        for expression in ("1.2.3 *", "1..2 +", "3.0.1 +", "2(3)*", "2x"):
+            with self.assertRaises(ValueError) as cm:
+                self.calculator.evaluate(expression)
+            self.assertEqual(str(cm.exception), f"invalid token: {expression.split()[0]}")
+
+    def test_operands_and_operators_alternate(self):
+        for expression in ("3 5 +", "3 * * 4", "* 3", "(3)(4)"):
+            with self.assertRaises(ValueError):
+                self.calculator.evaluate(expression)
+
     def test_not_enough_operands(self):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_parentheses(self):
+        result = self.calculator.evaluate("2 * (3 + 4)")
+        self.assertEqual(result, 14)
+
+    def test_unary_minus(self):
+        result = self.calculator.evaluate("-(2 + 3) * -2")
+        self.assertEqual(result, 10)
+
+    def test_no_spaces(self):
+        result = self.calculator.evaluate("2*3-8/2+5")
+        self.assertEqual(result, 7)
+
+    def test_left_associative(self):
+        result = self.calculator.evaluate("10 - 4 - 3")
+        self.assertEqual(result, 3)
+
+    def test_mismatched_parentheses(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("(3 + 5")
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("3 + 5)")
+
+    def test_variables(self):
+        result = self.calculator.evaluate("x * (y + 1)", {"x": 2, "y": 3})
+        self.assertEqual(result, 8)
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x * 2", {})
+
+    def test_evaluate_columns(self):
+        result = self.calculator.evaluate_columns(
+            "x * 2 - y / 4", {"x": [1, 2, 3], "y": [4, 8, 0]}
+        )
+        self.assertEqual(list(result), [1, 2, 6])
+
+    def test_evaluate_columns_division_by_zero(self):
+        result = self.calculator.evaluate_columns("x / y", {"x": [1, -1], "y": [0, 0]})
+        self.assertEqual(list(result), [float("inf"), float("-inf")])
+
+    def test_compact_json_output(self):
+        self.assertEqual(
+            format_json_output("1 / 2", 0.5, indent=None),
+            '{"expression":"1 / 2","result":0.5}',
+        )
+        self.assertEqual(
+            json.loads(format_json_output('"8"', 8.0, indent=None)),
+            {"expression": '"8"', "result": 8},
+        )
+
+    def test_evaluate_stream(self):
+        out = io.StringIO()
+        records, errors = evaluate_stream(
+            self.calculator, io.StringIO("3 + 5\n\n2 / 0\n1 +\n"), out, chunk_lines=2
+        )
+        self.assertEqual((records, errors), (4, 3))
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[0], {"expression": "3 + 5", "result": 8})
+        self.assertEqual([("error" in line) for line in lines], [False, True, True, True])
+
+    def test_evaluate_csv_skips_blank_lines(self):
+        out = io.StringIO()
+        rows = evaluate_csv("x * 2", io.StringIO("x,y\n1,a\n\n , \n3,b\n"), out)
+        self.assertEqual(rows, 2)
+        self.assertEqual(out.getvalue().splitlines(), ["x,y,result", "1,a,2", "3,b,6"])
+
+    def test_evaluate_csv_bad_rows(self):
+        for text, message in (
+            ("x,y\n1,2\n3\n", "line 3: expected 2 fields, got 1"),
+            ("x,y\n1,2\n,4\n", "line 3: invalid number for x: ''"),
+        ):
+            out = io.StringIO()
+            with self.assertRaises(ValueError) as cm:
+                evaluate_csv("x + y", io.StringIO(text), out)
+            self.assertEqual(str(cm.exception), message)
+            self.assertEqual(out.getvalue().splitlines(), ["x,y,result"])
+
 
 if __name__ == "__main__":
     unittest.main()
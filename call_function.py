@@ -1,52 +1,260 @@
-from google.genai import types
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import cache
 
-from config import WORKING_DIR
-from functions.get_file_info import schema_get_files_info, get_files_info
-from functions.run_python_file import schema_run_python_file, run_python_file
-from functions.get_file_content import schema_get_file_content, get_file_content
-from functions.write_files import schema_write_file, write_file
+from config import MAX_TOOL_WORKERS, WORKING_DIR
+from functions.registry import ArgumentError, get_tool_declarations, load_tools
+from lazy_imports import LazyModule
+from prompts import system_prompt
+from telemetry import get_tracer, span
 
-available_functions = types.Tool(
-    function_declarations=[
-        schema_get_files_info,
-        schema_run_python_file,
-        schema_get_file_content,
-        schema_write_file,
-    ]
-)
+asyncio = LazyModule("asyncio")
+types = LazyModule("google.genai.types")
 
+# name -> registry.Tool; dispatch is a lookup in this table.
+tools = load_tools()
 
-def call_function(function_call_part, verbose=False):
+
+def get_available_functions():
+    return get_tool_declarations()
+
+
+@cache
+def get_generate_config():
+    # Built once: the declarations and system prompt never change within a
+    # process, and a shared object lets ResponseCache reuse its serialization.
+    return types.GenerateContentConfig(
+        tools=[get_available_functions()], system_instruction=system_prompt
+    )
+
+
+def __getattr__(name):
+    if name == "available_functions":
+        return get_available_functions()
+    if name == "function_map":
+        return {name: entry.function for name, entry in tools.items()}
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def function_response(function_name, response):
+    return types.Content(
+        role="tool",
+        parts=[
+            types.Part.from_function_response(name=function_name, response=response)
+        ],
+    )
+
+
+def announce_call(function_call_part, verbose=False):
     if verbose:
         print(f"Calling function: {function_call_part.name}({function_call_part.args})")
     else:
         print(f" - Calling function: {function_call_part.name}")
-    function_map = {
-        "get_files_info": get_files_info,
-        "get_file_content": get_file_content,
-        "run_python_file": run_python_file,
-        "write_file": write_file,
-    }
+
+
+def prepare_call(function_call_part, verbose=False, working_directory=WORKING_DIR, quiet=False):
+    """Return (tool, args) for a call, or (None, error response).
+
+    Each call is announced on stdout, with its arguments if verbose, unless
+    quiet is set.
+    """
+    if not quiet:
+        announce_call(function_call_part, verbose)
     function_name = function_call_part.name
-    if function_name not in function_map:
-        return types.Content(
-            role="tool",
-            parts=[
-                types.Part.from_function_response(
-                    name=function_name,
-                    response={"error": f"Unknown function: {function_name}"},
-                )
-            ],
+    tool = tools.get(function_name)
+    if tool is None:
+        return None, function_response(
+            function_name, {"error": f"Unknown function: {function_name}"}
         )
-    args = dict(function_call_part.args)
-    args["working_directory"] = WORKING_DIR
-    function_result = function_map[function_name](**args)
-    return types.Content(
-        role="tool",
-        parts=[
-            types.Part.from_function_response(
-                name=function_name,
-                response={"result": function_result},
+    try:
+        args = tool.validate(function_call_part.args)
+    except ArgumentError as e:
+        return None, function_response(
+            function_name, {"error": f"Invalid arguments for {function_name}: {e}"}
+        )
+    args["working_directory"] = working_directory
+    return tool, args
+
+
+def tool_span(function_call_part):
+    if get_tracer() is None:
+        # Spans are no-ops; skip measuring the arguments.
+        return span("tool", function_call_part.name)
+    args_bytes = len(json.dumps(function_call_part.args or {}, default=str))
+    return span("tool", function_call_part.name, args_bytes=args_bytes)
+
+
+def call_function(
+    function_call_part,
+    verbose=False,
+    tool_cache=None,
+    working_directory=WORKING_DIR,
+    quiet=False,
+):
+    tool, args = prepare_call(function_call_part, verbose, working_directory, quiet)
+    if tool is None:
+        return args
+    function_name = tool.name
+    with tool_span(function_call_part) as attrs:
+        if tool_cache is not None:
+            function_result = tool_cache.call(tool, args)
+        else:
+            function_result = tool.function(**args)
+        attrs["result_bytes"] = len(str(function_result))
+    return function_response(function_name, {"result": function_result})
+
+
+async def call_function_async(
+    function_call_part,
+    verbose=False,
+    tool_cache=None,
+    working_directory=WORKING_DIR,
+    quiet=False,
+):
+    tool, args = prepare_call(function_call_part, verbose, working_directory, quiet)
+    if tool is None:
+        return args
+    function_name = tool.name
+    with tool_span(function_call_part) as attrs:
+        if tool.async_function is not None:
+            function_result = await tool.async_function(**args)
+            if tool_cache is not None:
+                tool_cache.record_write(tool, args)
+        elif tool_cache is not None:
+            function_result = await asyncio.to_thread(tool_cache.call, tool, args)
+        else:
+            function_result = await asyncio.to_thread(tool.function, **args)
+        attrs["result_bytes"] = len(str(function_result))
+    return function_response(function_name, {"result": function_result})
+
+
+def get_call_scope(function_call_part):
+    """Return (scope, is_write): the path a call touches, or "*" for all of them."""
+    tool = tools.get(function_call_part.name)
+    if tool is None:
+        return "*", False
+    args = function_call_part.args or {}
+    if tool.workspace or not isinstance(args.get(tool.path_arg), str):
+        scope = "*"
+    else:
+        scope = os.path.normpath(args[tool.path_arg])
+    # Only writes through a path argument order other calls; scripts still
+    # run alongside reads and each other, as they always have.
+    return scope, not tool.read_only and not tool.workspace
+
+
+def scopes_conflict(scope_a, scope_b):
+    return scope_a == "*" or scope_b == "*" or scope_a == scope_b
+
+
+class ToolDispatcher:
+    """Runs tool calls on a thread pool.
+
+    Calls are started in submission order. A call waits for every earlier,
+    still running call it conflicts with: two calls conflict when they touch
+    the same path (or the whole workspace) and at least one of them writes.
+    """
+
+    def __init__(
+        self,
+        verbose=False,
+        max_workers=MAX_TOOL_WORKERS,
+        tool_cache=None,
+        working_directory=WORKING_DIR,
+        quiet=False,
+    ):
+        self.verbose = verbose
+        self.tool_cache = tool_cache
+        self.working_directory = working_directory
+        self.quiet = quiet
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._submitted = []
+
+    def submit(self, function_call_part):
+        scope, is_write = get_call_scope(function_call_part)
+        self._submitted = [s for s in self._submitted if not s[0].done()]
+        depends_on = [
+            future
+            for future, other_scope, other_is_write in self._submitted
+            if (is_write or other_is_write) and scopes_conflict(scope, other_scope)
+        ]
+        future = self._executor.submit(self._run, function_call_part, depends_on)
+        self._submitted.append((future, scope, is_write))
+        return future
+
+    def map(self, function_call_parts):
+        futures = [self.submit(part) for part in function_call_parts]
+        return [future.result() for future in futures]
+
+    def _run(self, function_call_part, depends_on):
+        # Dependencies were submitted earlier, so with a FIFO pool they are
+        # already running and this wait cannot starve them of a worker.
+        if depends_on:
+            wait(depends_on)
+        return call_function(
+            function_call_part,
+            self.verbose,
+            self.tool_cache,
+            self.working_directory,
+            self.quiet,
+        )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def call_functions(
+    function_call_parts,
+    verbose=False,
+    tool_cache=None,
+    working_directory=WORKING_DIR,
+    quiet=False,
+):
+    if len(function_call_parts) == 1:
+        return [
+            call_function(
+                function_call_parts[0], verbose, tool_cache, working_directory, quiet
             )
-        ],
-    )
+        ]
+    with ToolDispatcher(
+        verbose, tool_cache=tool_cache, working_directory=working_directory, quiet=quiet
+    ) as dispatcher:
+        return dispatcher.map(function_call_parts)
+
+
+async def call_functions_async(
+    function_call_parts,
+    verbose=False,
+    tool_cache=None,
+    working_directory=WORKING_DIR,
+    quiet=False,
+):
+    # Same ordering rules as ToolDispatcher, expressed as task dependencies.
+    semaphore = asyncio.Semaphore(MAX_TOOL_WORKERS)
+    submitted = []
+
+    async def run(function_call_part, depends_on):
+        if depends_on:
+            await asyncio.wait(depends_on)
+        async with semaphore:
+            return await call_function_async(
+                function_call_part, verbose, tool_cache, working_directory, quiet
+            )
+
+    for function_call_part in function_call_parts:
+        scope, is_write = get_call_scope(function_call_part)
+        depends_on = [
+            task
+            for task, other_scope, other_is_write in submitted
+            if (is_write or other_is_write) and scopes_conflict(scope, other_scope)
+        ]
+        task = asyncio.create_task(run(function_call_part, depends_on))
+        submitted.append((task, scope, is_write))
+    return await asyncio.gather(*(task for task, _, _ in submitted))
@@ -0,0 +1,181 @@
+"""Shared, long-lived Gemini clients with retry and backoff.
+
+get_client() returns one client per (api key, base URL) for the life of
+the process, so its HTTP connection pool stays warm across turns and
+sessions. Model calls are retried with jittered exponential backoff on
+rate limiting (429), server errors (5xx) and transport failures, so a
+transient failure costs a short wait rather than one of the agent loop's
+MAX_ITERS iterations.
+"""
+
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from config import (
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+)
+from lazy_imports import LazyModule
+from telemetry import annotate
+
+asyncio = LazyModule("asyncio")
+httpx = LazyModule("httpx")
+genai = LazyModule("google.genai")
+errors = LazyModule("google.genai.errors")
+types = LazyModule("google.genai.types")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, error):
+        if isinstance(error, errors.APIError):
+            return error.code in RETRYABLE_STATUS_CODES
+        return isinstance(error, httpx.TransportError)
+
+    def delay(self, attempt, error):
+        # Full jitter: a uniform wait up to the exponential cap, unless the
+        # server said how long to wait.
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(policy, function, *args, **kwargs):
+    for attempt in range(policy.max_attempts):
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            if attempt + 1 >= policy.max_attempts or not policy.is_retryable(e):
+                raise
+            annotate(retries=attempt + 1)
+            time.sleep(policy.delay(attempt, e))
+
+
+async def call_with_retry_async(policy, function, *args, **kwargs):
+    for attempt in range(policy.max_attempts):
+        try:
+            return await function(*args, **kwargs)
+        except Exception as e:
+            if attempt + 1 >= policy.max_attempts or not policy.is_retryable(e):
+                raise
+            annotate(retries=attempt + 1)
+            await asyncio.sleep(policy.delay(attempt, e))
+
+
+class RetryingModels:
+    def __init__(self, models, policy):
+        self._models = models
+        self._policy = policy
+
+    def generate_content(self, **kwargs):
+        return call_with_retry(self._policy, self._models.generate_content, **kwargs)
+
+    def generate_content_stream(self, **kwargs):
+        # Only a failure before the first chunk can be retried safely;
+        # after that the caller has already acted on part of the turn.
+        for attempt in range(self._policy.max_attempts):
+            started = False
+            try:
+                for chunk in self._models.generate_content_stream(**kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if (
+                    started
+                    or attempt + 1 >= self._policy.max_attempts
+                    or not self._policy.is_retryable(e)
+                ):
+                    raise
+                time.sleep(self._policy.delay(attempt, e))
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class AsyncRetryingModels:
+    def __init__(self, models, policy):
+        self._models = models
+        self._policy = policy
+
+    async def generate_content(self, **kwargs):
+        return await call_with_retry_async(
+            self._policy, self._models.generate_content, **kwargs
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class RetryingClient:
+    def __init__(self, client, policy):
+        self._client = client
+        self.models = RetryingModels(client.models, policy)
+        self.aio = SimpleNamespace(models=AsyncRetryingModels(client.aio.models, policy))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def make_http_options(base_url=None):
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return types.HttpOptions(
+        base_url=base_url,
+        client_args={"limits": limits},
+        async_client_args={"limits": limits},
+    )
+
+
+def get_client(api_key=None, base_url=None, retry_policy=None):
+    if api_key is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY environment variable not set")
+    key = (api_key, base_url)
+    with _lock:
+        if key not in _clients:
+            client = genai.Client(
+                api_key=api_key, http_options=make_http_options(base_url)
+            )
+            _clients[key] = RetryingClient(client, retry_policy or RetryPolicy())
+        return _clients[key]
@@ -1,3 +1,38 @@
 MAX_CHARS = 10000
 WORKING_DIR = "./calculator"
 MAX_ITERS = 20
+MAX_TOOL_WORKERS = 4
+RUN_TIMEOUT = 30
+RUN_OUTPUT_HEAD_BYTES = 4096
+RUN_OUTPUT_TAIL_BYTES = 4096
+RUN_OUTPUT_KILL_BYTES = 8 * 1024 * 1024
+RESPONSE_CACHE_DIR = ".cache/responses"
+RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+MAX_LIST_ENTRIES = 200
+MAX_LIST_DEPTH = 10
+PYTHON_WORKER_POOL = False
+WORKER_POOL_SIZE = 2
+WORKER_MAX_RUNS = 50
+WORKER_START_TIMEOUT = 10
+HISTORY_TOKEN_BUDGET = 32000
+HISTORY_KEEP_RECENT = 4
+HISTORY_TRUNCATE_CHARS = 1000
+BATCH_WORKERS = 4
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 60.0
+STARTUP_BUDGET_MS = 150
+INDEX_MAX_FILE_BYTES = 1024 * 1024
+SEARCH_MAX_RESULTS = 50
+PREFETCH_BUDGET_BYTES = 1024 * 1024
+PREFETCH_MAX_FILES = 8
+PREFETCH_EXTENSIONS = (".py", ".md", ".txt", ".json", ".toml")
+SESSION_LOG_DIR = ".cache/sessions"
+SERVER_MAX_SESSIONS = 16
+SERVER_MAX_QUEUED = 64
+SERVER_QUEUE_TIMEOUT = 30.0
+SERVER_SESSION_TIMEOUT = 300.0
+SERVER_READ_TIMEOUT = 10.0
+SERVER_MAX_REQUEST_BYTES = 1024 * 1024
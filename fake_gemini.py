@@ -1,82 +1,126 @@
-from unittest.mock import MagicMock
+"""Offline stand-ins for genai.Client.
+
+ScriptedClient replays a conversation fixture: a list of turns, each either
+final text or a batch of function calls, optionally with a simulated model
+latency. Responses are real SDK types, so everything downstream of the
+client (tool dispatch, caching, streaming) behaves as it does against the
+API. Each client keeps its own position in the script.
+"""
+
+import asyncio
+import json
+import os
+import time
+from functools import lru_cache
 from types import SimpleNamespace
 
+from google.genai import types
 
-def make_fake_response(
-    with_function_call=True,
-    text="This is fake text output",
-):
-    global counter
-    counter += 1
-    response_1 = "get_files_info"
-    response_2 = "get_file_content"
-    response_3 = """
-Alright, I've examined the code in `main.py`. Here's how the calculator renders results to the console:
+from history import estimate_tokens
 
-- **`print(to_print)`:** The core of the output is done using the `print()` function.
-- **`format_json_output(expression, result)`:** Before printing, the `format_json_output` function (imported from `pkg.render`) is used to format the result and the original expression into a JSON-like string. This formatted string is then stored in the `to_print` variable.
-- **Error handling:** The code includes error handling with `try...except` blocks. If there's an error during the calculation (e.g., invalid expression), an error message is printed to the console using `print(f"Error: {e}")`.
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_FIXTURE = os.path.join(FIXTURES_DIR, "calculator_render.json")
 
-So, the calculator evaluates the expression, formats the result (along with the original expression) into a JSON-like string, and then prints that string to the console. It also prints error messages to the console if any errors occur.
-"""
-    func_name = ""
-    func_args = {}
-    if counter == 1:
-        func_name = response_1
-    if counter == 2:
-        func_name = response_2
-        func_args = {"file_path": "main.py"}
-    if counter == 3:
-        func_name = ""
-    # ---- MOCK USAGE METADATA ----
-    usage_metadata = SimpleNamespace(
-        prompt_token_count=42,
-        candidates_token_count=17,
+
+@lru_cache(maxsize=None)
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def make_response(turn, contents):
+    if turn.get("function_calls"):
+        parts = [
+            types.Part(
+                function_call=types.FunctionCall(name=call["name"], args=call.get("args", {}))
+            )
+            for call in turn["function_calls"]
+        ]
+    else:
+        parts = [types.Part(text=turn.get("text", ""))]
+    prompt_tokens = turn.get("prompt_tokens")
+    if prompt_tokens is None:
+        prompt_tokens = sum(estimate_tokens(content) for content in contents)
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(role="model", parts=parts), finish_reason="STOP"
+            )
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=turn.get("response_tokens", 17),
+        ),
     )
 
-    # ---- MOCK NORMAL TEXT OUTPUT ----
-    fake_text = text
 
-    # ---- MOCK FUNCTION CALLS ----
-    if with_function_call:
-        fake_function_call = SimpleNamespace(
-            name=func_name,
-            # args={"value": 123},
-            # args={"file_path": "main.py"},
-            args=func_args,
+def split_into_chunks(response, chunks=3):
+    parts = response.candidates[0].content.parts
+    if len(parts) == 1 and parts[0].text:
+        text = parts[0].text
+        step = max(1, -(-len(text) // chunks))
+        parts = [types.Part(text=text[i : i + step]) for i in range(0, len(text), step)]
+    for part in parts:
+        yield types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))],
+            usage_metadata=response.usage_metadata,
         )
-        function_calls = [fake_function_call]
-    else:
-        function_calls = []
 
-    # ---- MOCK CANDIDATES ----
-    fake_candidate = SimpleNamespace(
-        content=func_name,
-        finish_reason="stop",
-    )
-    candidates = [fake_candidate]
 
-    # ---- BUILD RESPONSE ----
-    resp = MagicMock()
-    resp.usage_metadata = usage_metadata
-    resp.text = fake_text
-    resp.function_calls = function_calls
-    resp.candidates = candidates
+class ScriptedModels:
+    def __init__(self, client):
+        self._client = client
 
-    return resp
+    def generate_content(self, model, contents, config):
+        turn = self._client.next_turn()
+        latency = turn.get("latency", self._client.latency)
+        if latency:
+            time.sleep(latency)
+        return make_response(turn, contents)
 
+    def generate_content_stream(self, model, contents, config):
+        return split_into_chunks(self.generate_content(model, contents, config))
 
-counter = 0
 
+class AsyncScriptedModels:
+    def __init__(self, client):
+        self._client = client
+
+    async def generate_content(self, model, contents, config):
+        turn = self._client.next_turn()
+        latency = turn.get("latency", self._client.latency)
+        if latency:
+            await asyncio.sleep(latency)
+        return make_response(turn, contents)
+
+
+class ScriptedClient:
+    def __init__(self, turns, latency=0.0):
+        self.turns = turns
+        self.latency = latency
+        self.position = 0
+        self.models = ScriptedModels(self)
+        self.aio = SimpleNamespace(models=AsyncScriptedModels(self))
+
+    @classmethod
+    def from_fixture(cls, path, latency=None):
+        fixture = load_fixture(path)
+        if latency is None:
+            latency = fixture.get("latency", 0.0)
+        return cls(fixture["turns"], latency)
+
+    def next_turn(self):
+        # Past the end of the script the final turn is repeated.
+        turn = self.turns[min(self.position, len(self.turns) - 1)]
+        self.position += 1
+        return turn
+
+    def reset(self):
+        self.position = 0
 
-class FakeModels:
-    def generate_content(self, model, contents, config):
-        # You can toggle whether a function call happens:
-        if counter < 3:
-            return make_fake_response(with_function_call=True)
-        else:
-            return make_fake_response(with_function_call=False)
 
+class FakeClient(ScriptedClient):
+    """The default calculator walkthrough, used by main.call_fake_ai."""
 
-class FakeClient:
-    models = FakeModels()
+    def __init__(self, latency=0.0):
+        super().__init__(load_fixture(DEFAULT_FIXTURE)["turns"], latency)
@@ -1 +0,0 @@
-from google.genai import types
@@ -1,40 +1,169 @@
+import mmap
 import os
 
-from google.genai import types
-
 from config import MAX_CHARS
+from functions.registry import tool
+from functions.shared_utils import resolve_path
+
+# path -> ((st_size, st_mtime_ns), line count), so paging through a large
+# file doesn't rescan it on every call.
+_line_counts = {}
+LINE_COUNT_CACHE_SIZE = 1024
+
+
+def count_lines(f, size):
+    # Counts newlines in binary chunks; nothing is decoded.
+    f.seek(0)
+    lines = 0
+    last = b""
+    while chunk := f.read(1 << 20):
+        lines += chunk.count(b"\n")
+        last = chunk[-1:]
+    if size and last != b"\n":
+        lines += 1
+    return lines
+
+
+def total_lines(f):
+    st = os.fstat(f.fileno())
+    signature = (st.st_size, st.st_mtime_ns)
+    cached = _line_counts.get(f.name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    lines = count_lines(f, st.st_size)
+    if len(_line_counts) >= LINE_COUNT_CACHE_SIZE:
+        _line_counts.clear()
+    _line_counts[f.name] = (signature, lines)
+    return lines
+
+
+def skip_lines(m, pos, count):
+    # Byte offset just past `count` newlines from pos, or len(m) at the end.
+    for _ in range(count):
+        pos = m.find(b"\n", pos)
+        if pos == -1:
+            return len(m)
+        pos += 1
+    return pos
+
+
+def read_lines(f, size, start_line, end_line, length):
+    # The mmap lets find() locate line boundaries without decoding or
+    # copying the prefix of the file.
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        start = skip_lines(m, 0, start_line - 1)
+        if start >= size:
+            return None, start, start, size
+        stop = size if end_line is None else skip_lines(m, start, end_line - start_line + 1)
+        end = min(stop, start + length)
+        return m[start:end], start, end, stop
+
+
+def read_range(f, size, file_path, offset, length, start_line, end_line):
+    length = MAX_CHARS if length is None else min(int(length), MAX_CHARS)
+    if length < 1:
+        # An empty window would never get past the truncation point.
+        return f"Error: length must be at least 1, got {length}"
+    by_line = start_line is not None or end_line is not None
+    if by_line:
+        start_line = max(1, int(start_line or 1))
+        end_line = None if end_line is None else int(end_line)
+        data = None
+        if size:
+            data, start, end, stop = read_lines(
+                f, size, start_line, end_line, length
+            )
+        elif start_line == 1:
+            # An empty file is an empty range, not one past its end.
+            data, start, end, stop = b"", 0, 0, 0
+        if data is None:
+            return f'Error: start_line {start_line} is past the end of "{file_path}" ({total_lines(f)} lines)'
+    else:
+        start = max(0, int(offset or 0))
+        f.seek(start)
+        data = f.read(length)
+        end = start + len(data)
+        stop = size
+
+    content = (
+        f'[File "{file_path}": bytes {start}-{end} of {size}, {total_lines(f)} lines in total]\n'
+        + data.decode("utf-8", errors="replace")
+    )
+    if end < stop:
+        resume = next_range(data, end, start_line, end_line, by_line)
+        content += f"\n[...Range truncated at {length} bytes; continue with {resume}]"
+    return content
 
 
-def get_file_content(working_directory, file_path):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
+def next_range(data, end, start_line, end_line, by_line):
+    # Line ranges continue by line, from the line the cut fell in, unless
+    # that line alone is longer than the window.
+    newlines = data.count(b"\n")
+    if not by_line or newlines == 0:
+        return f"offset={end}"
+    if end_line is None:
+        return f"start_line={start_line + newlines}"
+    return f"start_line={start_line + newlines}, end_line={end_line}"
+
+
+@tool(
+    description=f"Reads the content of a specified file within the working directory. Without a range it returns the first {MAX_CHARS} characters; with offset/length or start_line/end_line it returns that window (at most {MAX_CHARS} bytes) prefixed with the file's total size and line count.",
+    parameters={
+        "file_path": {
+            "type": "STRING",
+            "description": "The path to the file whose content should be read, relative to the working directory.",
+        },
+        "offset": {
+            "type": "INTEGER",
+            "description": "Byte offset to start reading from.",
+        },
+        "length": {
+            "type": "INTEGER",
+            "description": f"Number of bytes to read, at most {MAX_CHARS}.",
+        },
+        "start_line": {
+            "type": "INTEGER",
+            "description": "First line to read (1-based). Takes precedence over offset.",
+        },
+        "end_line": {
+            "type": "INTEGER",
+            "description": "Last line to read (1-based, inclusive).",
+        },
+    },
+    required=["file_path"],
+    read_only=True,
+    path_arg="file_path",
+    cacheable=True,
+)
+def get_file_content(
+    working_directory,
+    file_path,
+    offset=None,
+    length=None,
+    start_line=None,
+    end_line=None,
+):
+    abs_file_path = resolve_path(working_directory, file_path)
+    if abs_file_path is None:
         return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
     if not os.path.isfile(abs_file_path):
         return f'Error: File not found or is not a regular file: "{file_path}"'
     try:
+        if any(v is not None for v in (offset, length, start_line, end_line)):
+            with open(abs_file_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                return read_range(
+                    f, size, file_path, offset, length, start_line, end_line
+                )
         with open(abs_file_path, "r") as f:
             content = f.read(MAX_CHARS)
-            if os.path.getsize(abs_file_path) > MAX_CHARS:
+            size = os.fstat(f.fileno()).st_size
+            if size > MAX_CHARS:
                 content += (
-                    f'[...File "{file_path}" truncated at {MAX_CHARS} characters]'
+                    f'[...File "{file_path}" truncated at {MAX_CHARS} characters; '
+                    f"{size} bytes, {total_lines(f.buffer)} lines in total. Use offset/length "
+                    "or start_line/end_line to read the rest]"
                 )
         return content
     except Exception as e:
         return f'Error reading file "{file_path}": {e}'
-
-
-schema_get_file_content = types.FunctionDeclaration(
-    name="get_file_content",
-    description=f"Reads and returns the first {MAX_CHARS} characters of the content from a specified file within the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="The path to the file whose content should be read, relative to the working directory.",
-            ),
-        },
-        required=["file_path"],
-    ),
-)
@@ -1,40 +1,99 @@
 import os
+from fnmatch import fnmatch
+from itertools import islice
 
-from google.genai import types
+from config import MAX_LIST_DEPTH, MAX_LIST_ENTRIES
+from functions.registry import tool
+from functions.shared_utils import resolve_path
 
 
-def get_files_info(working_directory, directory="."):
-    abs_working_dir = os.path.abspath(working_directory)
-    target_dir = os.path.abspath(os.path.join(working_directory, directory))
-    if not target_dir.startswith(abs_working_dir):
+def iter_entries(target_dir, depth, prefix=""):
+    # Depth-first, sorted by name so a cursor (an offset) stays stable
+    # between calls. DirEntry caches the file type from the directory read,
+    # so only the size needs a stat. Symlinked directories are listed but
+    # not entered, so a link cycle or a link out of the working directory
+    # can't be followed.
+    with os.scandir(target_dir) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        rel_path = prefix + entry.name
+        is_dir = entry.is_dir()
+        try:
+            file_size = entry.stat().st_size
+        except OSError:
+            file_size = 0
+        yield rel_path, entry.name, file_size, is_dir
+        if depth > 1 and entry.is_dir(follow_symlinks=False):
+            yield from iter_entries(entry.path, depth - 1, rel_path + "/")
+
+
+@tool(
+    description="Lists files in the specified directory along with their sizes, constrained to the working directory. Can descend into subdirectories, filter by a glob pattern and page through large listings.",
+    parameters={
+        "directory": {
+            "type": "STRING",
+            "description": "The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
+        },
+        "depth": {
+            "type": "INTEGER",
+            "description": f"How many directory levels to list. 1 (the default) lists only the directory itself; larger values also list the contents of subdirectories, with paths relative to the listed directory. At most {MAX_LIST_DEPTH}.",
+        },
+        "pattern": {
+            "type": "STRING",
+            "description": "Optional glob pattern (e.g. '*.py'), matched against each entry's name or relative path. Subdirectories are still descended into when they don't match.",
+        },
+        "max_entries": {
+            "type": "INTEGER",
+            "description": f"Maximum number of entries to return, at most {MAX_LIST_ENTRIES}.",
+        },
+        "cursor": {
+            "type": "STRING",
+            "description": "Continuation cursor from a previous truncated listing.",
+        },
+    },
+    read_only=True,
+    path_arg="directory",
+    path_default=".",
+    workspace=True,
+    cacheable=True,
+)
+def get_files_info(
+    working_directory,
+    directory=".",
+    depth=1,
+    pattern=None,
+    max_entries=MAX_LIST_ENTRIES,
+    cursor=None,
+):
+    target_dir = resolve_path(working_directory, directory)
+    if target_dir is None:
         return f'Error: Cannot list "{directory}" as it is outside the permitted working directory'
     if not os.path.isdir(target_dir):
         return f'Error: "{directory}" is not a directory'
     try:
-        files_info = []
-        for filename in os.listdir(target_dir):
-            filepath = os.path.join(target_dir, filename)
-            file_size = 0
-            is_dir = os.path.isdir(filepath)
-            file_size = os.path.getsize(filepath)
+        depth = max(1, min(int(depth), MAX_LIST_DEPTH))
+        max_entries = max(1, min(int(max_entries), MAX_LIST_ENTRIES))
+        offset = int(cursor) if cursor else 0
+    except (TypeError, ValueError) as e:
+        return f"Error: invalid listing arguments: {e}"
+    try:
+        entries = iter_entries(target_dir, depth)
+        if pattern:
+            entries = (
+                entry
+                for entry in entries
+                if fnmatch(entry[1], pattern) or fnmatch(entry[0], pattern)
+            )
+        page = list(islice(entries, offset, offset + max_entries + 1))
+        files_info = [
+            f"- {rel_path}: file_size={file_size} bytes, is_dir={is_dir}"
+            for rel_path, _, file_size, is_dir in page[:max_entries]
+        ]
+        if len(page) > max_entries:
             files_info.append(
-                f"- {filename}: file_size={file_size} bytes, is_dir={is_dir}"
+                f"[Listing truncated after {max_entries} entries; "
+                f'call again with cursor="{offset + max_entries}" to continue]'
             )
         return "\n".join(files_info)
     except Exception as e:
         return f"Error listing files: {e}"
-
-
-schema_get_files_info = types.FunctionDeclaration(
-    name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "directory": types.Schema(
-                type=types.Type.STRING,
-                description="The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
-            ),
-        },
-    ),
-)
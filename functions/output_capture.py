@@ -0,0 +1,247 @@
+"""Bounded capture of a child process's stdout and stderr.
+
+Only the first head_bytes and last tail_bytes of each stream are kept, so a
+script that prints hundreds of megabytes costs a few kilobytes of memory,
+and the process group is killed once a stream passes kill_bytes.
+
+This module only uses the standard library: python_worker.py imports it
+before it has the repo on sys.path.
+"""
+
+import os
+import selectors
+import signal
+import subprocess
+import time
+
+READ_CHUNK = 65536
+
+
+class StreamCapture:
+    def __init__(self, head_bytes, tail_bytes):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def feed(self, data):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            # Deleting from the front of a bytearray doesn't copy the rest.
+            del self.tail[: len(self.tail) - self.tail_bytes]
+
+    @property
+    def omitted(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self):
+        if not self.omitted:
+            return (self.head + self.tail).decode(errors="replace")
+        return (
+            self.head.decode(errors="replace")
+            + f"\n... [{self.omitted} bytes truncated] ...\n"
+            + self.tail.decode(errors="replace")
+        )
+
+
+def capture_file(file, head_bytes, tail_bytes):
+    """Return a StreamCapture of an output file without reading all of it."""
+    size = os.fstat(file.fileno()).st_size
+    capture = StreamCapture(head_bytes, tail_bytes)
+    file.seek(0)
+    capture.feed(file.read(head_bytes))
+    # A stream shorter than head_bytes was read whole above.
+    start = min(max(head_bytes, size - tail_bytes), size)
+    if size > start:
+        file.seek(start)
+        capture.feed(file.read(size - start))
+    capture.total = size
+    return capture
+
+
+class RunResult:
+    def __init__(
+        self,
+        stdout,
+        stderr,
+        returncode,
+        wall_time,
+        cpu_time,
+        stdout_truncated=0,
+        stderr_truncated=0,
+        killed=None,
+    ):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.stdout_truncated = stdout_truncated
+        self.stderr_truncated = stderr_truncated
+        # Why the process group was killed early, if it was.
+        self.killed = killed
+
+    @classmethod
+    def from_captures(cls, stdout, stderr, returncode, wall_time, cpu_time, killed=None):
+        return cls(
+            stdout.text(),
+            stderr.text(),
+            returncode,
+            wall_time,
+            cpu_time,
+            stdout.omitted,
+            stderr.omitted,
+            killed,
+        )
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def cpu_seconds(rusage):
+    return rusage.ru_utime + rusage.ru_stime
+
+
+def wait_for_exit(pid, deadline):
+    """Wait until pid has exited, without reaping it; False on deadline.
+
+    Leaving the child a zombie keeps its pid, and so its process group id,
+    from being reused while the rest of the group is killed.
+    """
+    delay = 0.0005
+    while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+    return True
+
+
+def run_captured(commands, cwd, timeout, head_bytes, tail_bytes, kill_bytes):
+    """Run commands in a new session, capturing output incrementally.
+
+    Raises subprocess.TimeoutExpired, after killing the whole process group,
+    if the run takes longer than timeout seconds.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    process = subprocess.Popen(
+        commands,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    stdout = StreamCapture(head_bytes, tail_bytes)
+    stderr = StreamCapture(head_bytes, tail_bytes)
+    streams = {
+        process.stdout.fileno(): ("stdout", stdout),
+        process.stderr.fileno(): ("stderr", stderr),
+    }
+    killed = None
+    try:
+        with selectors.DefaultSelector() as selector:
+            for fd in streams:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map() and killed is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, READ_CHUNK)
+                    if not data:
+                        selector.unregister(key.fd)
+                        continue
+                    name, capture = streams[key.fd]
+                    capture.feed(data)
+                    if capture.total > kill_bytes:
+                        killed = f"{name} exceeded {kill_bytes} bytes"
+                        break
+        timed_out = killed is None and not wait_for_exit(process.pid, deadline)
+        # Kill the whole session: on timeout or overflow, and also any
+        # background processes the script left behind.
+        kill_group(process.pid)
+        # Reap the child ourselves for its resource usage; Popen only needs
+        # the exit code.
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if process.returncode is None:
+            kill_group(process.pid)
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    wall_time = time.monotonic() - start
+    if timed_out:
+        raise subprocess.TimeoutExpired(commands, timeout, stdout.text(), stderr.text())
+    return RunResult.from_captures(
+        stdout, stderr, process.returncode, wall_time, cpu_seconds(rusage), killed
+    )
+
+
+async def run_captured_async(commands, cwd, timeout, head_bytes, tail_bytes, kill_bytes):
+    """run_captured on the running event loop, without blocking a thread.
+
+    The loop's child watcher reaps the child, so there is no resource usage
+    to read and cpu_time is None.
+    """
+    import asyncio
+
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *commands,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    stdout = StreamCapture(head_bytes, tail_bytes)
+    stderr = StreamCapture(head_bytes, tail_bytes)
+    killed = None
+
+    async def pump(name, stream, capture):
+        nonlocal killed
+        while data := await stream.read(READ_CHUNK):
+            capture.feed(data)
+            if capture.total > kill_bytes and killed is None:
+                killed = f"{name} exceeded {kill_bytes} bytes"
+                kill_group(process.pid)
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                pump("stdout", process.stdout, stdout),
+                pump("stderr", process.stderr, stderr),
+                process.wait(),
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        # As in run_captured: kill the whole session, on timeout, overflow
+        # or cancellation, and any background processes left behind.
+        kill_group(process.pid)
+        await process.wait()
+
+    wall_time = time.monotonic() - start
+    if timed_out:
+        raise subprocess.TimeoutExpired(commands, timeout, stdout.text(), stderr.text())
+    return RunResult.from_captures(stdout, stderr, process.returncode, wall_time, None, killed)
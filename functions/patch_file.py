@@ -0,0 +1,200 @@
+import os
+import re
+
+from functions.shared_utils import atomic_write, resolve_path
+from functions.registry import tool
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+    pass
+
+
+def line_of(content, index):
+    return content.count("\n", 0, index) + 1
+
+
+def apply_edits(content, edits):
+    """Apply search/replace edits in order; each search must match exactly once.
+
+    Returns the new content and the line each replacement starts on.
+    """
+    changed = []
+    for number, edit in enumerate(edits, 1):
+        search = edit.get("search") or ""
+        replace = edit.get("replace") or ""
+        if not search:
+            raise PatchError(f"edit {number} has an empty search string")
+        count = content.count(search)
+        if count != 1:
+            where = "not found" if count == 0 else f"found {count} times"
+            raise PatchError(
+                f"edit {number}: search text {where}; it must match exactly once, "
+                "so include more surrounding lines"
+            )
+        index = content.index(search)
+        content = content[:index] + replace + content[index + len(search) :]
+        changed.append(line_of(content, index))
+    return content, changed
+
+
+def parse_unified_diff(diff):
+    """Return hunks as (old_start, old_lines, new_lines) from unified diff text.
+
+    Each hunk body is read by the line counts in its @@ header, so a removed
+    line that starts with "--" or "++" isn't mistaken for a file header.
+    """
+    hunks = []
+    old_left = new_left = 0
+    for line in diff.splitlines():
+        if line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        if old_left == 0 and new_left == 0:
+            # Between hunks: file headers ("diff", "index", "---", "+++").
+            match = HUNK_HEADER_RE.match(line)
+            if match:
+                old_start, old_count, _, new_count = match.groups()
+                old_left = 1 if old_count is None else int(old_count)
+                new_left = 1 if new_count is None else int(new_count)
+                hunk = (int(old_start), [], [])
+                hunks.append(hunk)
+            elif hunks and line.startswith((" ", "-", "+")) and not line.startswith(("--- ", "+++ ")):
+                raise PatchError(
+                    f"hunk {len(hunks)} has more lines than its @@ header says; fix the line counts"
+                )
+            continue
+        if line.startswith("-") and old_left:
+            hunk[1].append(line[1:])
+            old_left -= 1
+        elif line.startswith("+") and new_left:
+            hunk[2].append(line[1:])
+            new_left -= 1
+        elif not line.startswith(("-", "+")) and old_left and new_left:
+            # Context; editors often strip the lone space of a blank line.
+            hunk[1].append(line[1:])
+            hunk[2].append(line[1:])
+            old_left -= 1
+            new_left -= 1
+        else:
+            raise PatchError(
+                f"hunk {len(hunks)} has more lines than its @@ header says; fix the line counts"
+            )
+    if old_left or new_left:
+        raise PatchError(
+            f"hunk {len(hunks)} has fewer lines than its @@ header says; fix the line counts"
+        )
+    if not hunks:
+        raise PatchError("diff contains no @@ hunks")
+    return hunks
+
+
+def find_block(lines, block, start, hint):
+    """Index in lines at or after start where block occurs, nearest to hint."""
+    best = None
+    first = block[0]
+    for index in range(start, len(lines) - len(block) + 1):
+        if lines[index] == first and lines[index : index + len(block)] == block:
+            if best is None or abs(index - hint) < abs(best - hint):
+                best = index
+            elif index > hint:
+                break
+    return best
+
+
+def apply_unified_diff(content, diff):
+    """Apply a unified diff to content, tolerating shifted line numbers.
+
+    Returns the new content and the line each hunk starts on.
+    """
+    lines = content.split("\n")
+    ends_with_newline = content.endswith("\n")
+    if ends_with_newline:
+        lines.pop()
+    output = []
+    changed = []
+    position = 0
+    for number, (old_start, old, new) in enumerate(parse_unified_diff(diff), 1):
+        if old:
+            index = find_block(lines, old, position, old_start - 1)
+            if index is None:
+                raise PatchError(
+                    f"hunk {number} (at line {old_start}) does not match the current file"
+                )
+        else:
+            # Pure insertion: old_start is the line it goes after.
+            index = old_start
+            if not position <= index <= len(lines):
+                raise PatchError(f"hunk {number} inserts out of order or past the end of the file")
+        output.extend(lines[position:index])
+        changed.append(len(output) + 1)
+        output.extend(new)
+        position = index + len(old)
+    output.extend(lines[position:])
+    return "\n".join(output) + ("\n" if ends_with_newline and output else ""), changed
+
+
+@tool(
+    description="Edits an existing file within the working directory without rewriting it. Pass either edits (search/replace pairs, each search matching exactly once, applied in order) or diff (a unified diff against the current file). Nothing is written unless every edit applies. Prefer this over write_file for changes to existing files.",
+    parameters={
+        "file_path": {
+            "type": "STRING",
+            "description": "Path to the file to edit, relative to the working directory.",
+        },
+        "edits": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "search": {
+                        "type": "STRING",
+                        "description": "Exact text to find, including enough context to be unique.",
+                    },
+                    "replace": {
+                        "type": "STRING",
+                        "description": "Text to put in its place.",
+                    },
+                },
+                "required": ["search", "replace"],
+            },
+            "description": "Search/replace edits, applied in order.",
+        },
+        "diff": {
+            "type": "STRING",
+            "description": "A unified diff (with @@ hunk headers) to apply to the file.",
+        },
+    },
+    required=["file_path"],
+    path_arg="file_path",
+)
+def patch_file(working_directory, file_path, edits=None, diff=None):
+    abs_file_path = resolve_path(working_directory, file_path)
+    if abs_file_path is None:
+        return f'Error: Cannot write to "{file_path}" as it is outside the permitted working directory'
+    if not os.path.isfile(abs_file_path):
+        return f'Error: File not found or is not a regular file: "{file_path}"'
+    if bool(edits) == bool(diff):
+        return "Error: patch_file needs exactly one of edits or diff"
+    try:
+        with open(abs_file_path, "r") as f:
+            content = f.read()
+        if edits:
+            new_content, changed = apply_edits(content, edits)
+        else:
+            new_content, changed = apply_unified_diff(content, diff)
+    except PatchError as e:
+        return f'Error: patching "{file_path}": {e}. The file was not changed.'
+    except Exception as e:
+        return f'Error reading file "{file_path}": {e}'
+    if new_content == content:
+        return f'No changes: the patch leaves "{file_path}" as it was'
+    try:
+        atomic_write(abs_file_path, new_content)
+    except Exception as e:
+        return f"Error: writing to file: {e}"
+    lines = ", ".join(str(line) for line in changed)
+    return (
+        f'Successfully patched "{file_path}" ({len(changed)} change(s) starting at '
+        f"line(s) {lines}; {len(new_content)} characters now)"
+    )
@@ -0,0 +1,158 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    MAX_CHARS,
+    PREFETCH_BUDGET_BYTES,
+    PREFETCH_EXTENSIONS,
+    PREFETCH_MAX_FILES,
+)
+from functions.registry import get_tool
+
+LISTING_LINE_RE = re.compile(r"^- (.+): file_size=(\d+) bytes, is_dir=(True|False)$", re.M)
+
+
+def listing_candidates(listing, directory, max_files=PREFETCH_MAX_FILES):
+    """Files from a get_files_info listing the model is likely to read next.
+
+    Returns paths relative to the working directory with their sizes,
+    preferring the extensions earliest in PREFETCH_EXTENSIONS and then
+    files nearest the listed directory, in listing order otherwise.
+    """
+    ranked = []
+    for position, match in enumerate(LISTING_LINE_RE.finditer(listing)):
+        rel_path, size, is_dir = match.group(1), int(match.group(2)), match.group(3)
+        extension = os.path.splitext(rel_path)[1]
+        if is_dir == "True" or not size or extension not in PREFETCH_EXTENSIONS:
+            continue
+        rank = (PREFETCH_EXTENSIONS.index(extension), rel_path.count("/"), position)
+        ranked.append((rank, os.path.normpath(os.path.join(directory, rel_path)), size))
+    ranked.sort()
+    return [(path, size) for _, path, size in ranked[:max_files]]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # One background thread serves every session in the process, so
+    # prefetching never competes with more than one thread's worth of work.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        return _executor
+
+
+class Prefetcher:
+    """Warms a ToolResultCache with get_file_content results in the background.
+
+    After a directory listing it reads the files the model is likely to ask
+    for next, on a background thread, while the model is still thinking.
+    A read the model then makes with the same arguments is an ordinary cache
+    hit. A foreground read of a file that is queued takes it off the queue,
+    and one of a file being read waits for that read instead of repeating it.
+
+    Prefetched results count against budget_bytes for the whole session,
+    whether or not they are read, so the memory spent is bounded.
+    """
+
+    def __init__(self, tool_cache, budget_bytes=PREFETCH_BUDGET_BYTES, max_files=PREFETCH_MAX_FILES):
+        self.tool_cache = tool_cache
+        self.budget_bytes = budget_bytes
+        self.max_files = max_files
+        self.read_tool = get_tool("get_file_content")
+        self._lock = threading.Lock()
+        # key -> None while queued, or an Event while being read
+        self._pending = {}
+        # key -> bytes, for prefetched results not read yet
+        self._warmed = {}
+        self.used_bytes = 0
+        self.prefetched = 0
+        self.over_budget = 0
+        self.hits = 0
+        self.misses = 0
+        tool_cache.prefetcher = self
+
+    def observe(self, tool, args, result):
+        """Queue reads suggested by a tool's result."""
+        if tool.name != "get_files_info" or not isinstance(result, str) or result.startswith("Error"):
+            return
+        directory = args.get("directory") or "."
+        batch = []
+        with self._lock:
+            for file_path, size in listing_candidates(result, directory, self.max_files):
+                read_args = {"file_path": file_path, "working_directory": args["working_directory"]}
+                key = self.tool_cache.key(self.read_tool, read_args)
+                if key in self._pending or key in self._warmed or self.tool_cache.has(key):
+                    continue
+                # Reads without a range return at most MAX_CHARS characters.
+                if self.used_bytes + min(size, MAX_CHARS) > self.budget_bytes:
+                    self.over_budget += 1
+                    continue
+                self.used_bytes += min(size, MAX_CHARS)
+                self._pending[key] = None
+                batch.append((key, read_args))
+        if batch:
+            get_executor().submit(self._warm, batch)
+
+    def _warm(self, batch):
+        for key, read_args in batch:
+            done = threading.Event()
+            with self._lock:
+                if key not in self._pending:
+                    # The model asked for it first.
+                    continue
+                self._pending[key] = done
+            try:
+                result = self.tool_cache.warm(self.read_tool, read_args)
+                if result is not None:
+                    with self._lock:
+                        self._warmed[key] = len(result)
+                        self.prefetched += 1
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                done.set()
+
+    def claim(self, key):
+        """Called before a foreground lookup of key.
+
+        Drops key from the queue, or waits for it if it is being read now.
+        """
+        with self._lock:
+            state = self._pending.pop(key, None)
+        if state is not None:
+            state.wait()
+
+    def record_lookup(self, tool, key, hit):
+        if tool is not self.read_tool:
+            return
+        with self._lock:
+            if hit and self._warmed.pop(key, None) is not None:
+                self.hits += 1
+            elif not hit:
+                self.misses += 1
+
+    def close(self):
+        # Drop whatever is still queued (a read in progress finishes) and
+        # detach, so the cache and the prefetcher don't keep each other alive.
+        with self._lock:
+            self._pending.clear()
+        self.tool_cache.prefetcher = None
+
+    def summary(self):
+        with self._lock:
+            reads = self.hits + self.misses
+            rate = f"{self.hits / reads:.0%}" if reads else "n/a"
+            unread = len(self._warmed)
+            return (
+                f"Prefetch: {self.prefetched} files warmed "
+                f"({self.used_bytes} of {self.budget_bytes} budget bytes, "
+                f"{self.over_budget} skipped over budget); "
+                f"{self.hits} hits, {self.misses} misses ({rate} hit rate); "
+                f"{unread} warmed but not read"
+            )
@@ -0,0 +1,144 @@
+"""Warm worker process for run_python_file's worker pool.
+
+Reads one JSON request per line on stdin and answers on the original
+stdout with a {"started": true} line as the script is about to run, then
+one JSON line with its result. Each script runs in a forked child with its
+own copy of the interpreter state, so nothing leaks between runs while
+interpreter startup and the stdlib imports below are paid only once per
+worker.
+"""
+
+import json
+import os
+import runpy
+import sys
+import tempfile
+import time
+import traceback
+
+from output_capture import RunResult, capture_file, cpu_seconds, kill_group
+
+# Modules commonly imported by scripts in the workspace; importing them here
+# means forked children find them in sys.modules already.
+WARM_MODULES = ["argparse", "json", "re", "unittest", "collections", "math"]
+
+
+def run_script(path, args):
+    sys.argv = [path] + list(args)
+    sys.path[0] = os.path.dirname(path)
+    try:
+        runpy.run_path(path, run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Drop the runpy frames so the traceback matches a plain `python` run.
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != path:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return code
+
+
+def wait_for_child(pid, timeout, outputs, kill_bytes):
+    """Wait for pid, killing its group if it overruns timeout or kill_bytes.
+
+    Background processes the script started are killed too. Returns
+    (status, rusage, reason) where reason is None, "timeout" or which
+    stream got too large.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    reason = None
+    # WNOWAIT leaves the child a zombie, so its pid (the group id) can't be
+    # reused before the group is killed.
+    while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+        if reason is None:
+            if time.monotonic() >= deadline:
+                reason = "timeout"
+            for name, file in outputs.items():
+                if os.fstat(file.fileno()).st_size > kill_bytes:
+                    reason = f"{name} exceeded {kill_bytes} bytes"
+            if reason is not None:
+                kill_group(pid)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+    kill_group(pid)
+    _, status, rusage = os.wait4(pid, 0)
+    return status, rusage, reason
+
+
+def handle(request, started=lambda: None):
+    """Run one request; started() is called just before the script is forked.
+
+    From then on the script may have run, even if the worker dies before
+    answering, so the pool must not run it again elsewhere.
+    """
+    limits = request["limits"]
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        start = time.monotonic()
+        started()
+        try:
+            pid = os.fork()
+        except OSError as e:
+            # Nothing ran, so the pool may still run the script elsewhere.
+            return {"error": f"could not fork: {e}", "started": False}
+        if pid == 0:
+            os.setpgid(0, 0)
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.dup2(out.fileno(), 1)
+            os.dup2(err.fileno(), 2)
+            os._exit(run_script(request["path"], request.get("args") or []))
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass
+        status, rusage, reason = wait_for_child(
+            pid, request["timeout"], {"stdout": out, "stderr": err}, limits["kill_bytes"]
+        )
+        if reason == "timeout":
+            return {"timeout": True}
+        return RunResult.from_captures(
+            capture_file(out, limits["head_bytes"], limits["tail_bytes"]),
+            capture_file(err, limits["head_bytes"], limits["tail_bytes"]),
+            os.waitstatus_to_exitcode(status),
+            time.monotonic() - start,
+            cpu_seconds(rusage),
+            reason,
+        ).to_dict()
+
+
+def main():
+    for name in WARM_MODULES:
+        __import__(name)
+    protocol = os.fdopen(os.dup(1), "w")
+
+    def send(response):
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+    # Each request gets a {"started": true} line before the script runs,
+    # then its result, so the pool can tell a worker that failed before the
+    # script could have run from one that died under it.
+    for line in sys.stdin:
+        try:
+            response = handle(json.loads(line), lambda: send({"started": True}))
+        except Exception as e:
+            response = {"error": str(e)}
+        send(response)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import atexit
+import json
+import os
+import select
+import subprocess
+import threading
+import time
+
+from config import PYTHON_WORKER_POOL, WORKER_MAX_RUNS, WORKER_POOL_SIZE, WORKER_START_TIMEOUT
+from functions.output_capture import RunResult
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_worker.py")
+
+
+class WorkerCrashed(Exception):
+    """A worker failed; started says whether the script had begun running."""
+
+    def __init__(self, message, started=False):
+        super().__init__(message)
+        self.started = started
+
+
+class PythonWorker:
+    def __init__(self, working_directory):
+        try:
+            self.process = subprocess.Popen(
+                ["python", WORKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=working_directory,
+            )
+        except OSError as e:
+            raise WorkerCrashed(f"could not start worker: {e}")
+        self.runs = 0
+        # Bytes read from the worker's stdout but not yet returned as lines.
+        self._buffer = bytearray()
+
+    def run(self, abs_file_path, args, timeout, limits):
+        self.runs += 1
+        request = {
+            "path": abs_file_path,
+            "args": args or [],
+            "timeout": timeout,
+            "limits": limits,
+        }
+        try:
+            self.process.stdin.write(json.dumps(request).encode() + b"\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WorkerCrashed(str(e))
+        # A worker that died on startup or failed to fork fails here, before
+        # the script has run.
+        response = self._read(WORKER_START_TIMEOUT, started=False)
+        if "error" in response:
+            raise WorkerCrashed(response["error"])
+        # The worker enforces the timeout itself; the margin here only
+        # guards against the worker hanging.
+        response = self._read(timeout + 5, started=True)
+        if "error" in response:
+            raise WorkerCrashed(response["error"], response.get("started", True))
+        return response
+
+    def _read(self, timeout, started):
+        """Return the worker's next JSON line.
+
+        Reads the raw fd into our own buffer: the "started" line and the
+        result can arrive in one read, and a line left in a BufferedReader
+        is invisible to select.
+        """
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while (end := self._buffer.find(b"\n")) == -1:
+            remaining = deadline - time.monotonic()
+            try:
+                ready, _, _ = select.select([fd], [], [], max(0.0, remaining))
+                data = os.read(fd, 65536) if ready else b""
+            except OSError as e:
+                raise WorkerCrashed(str(e), started)
+            if not data:
+                state = "while running the script" if started else "before running the script"
+                raise WorkerCrashed(f"worker exited or stopped responding {state}", started)
+            self._buffer += data
+        line = bytes(self._buffer[: end + 1])
+        del self._buffer[: end + 1]
+        return json.loads(line)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class PythonWorkerPool:
+    """Pre-started workers per working directory.
+
+    A worker is replaced after it crashes or after WORKER_MAX_RUNS scripts.
+    """
+
+    def __init__(self, size=WORKER_POOL_SIZE, max_runs=WORKER_MAX_RUNS):
+        self.size = size
+        self.max_runs = max_runs
+        self._idle = {}
+        self._count = {}
+        self._cond = threading.Condition()
+
+    def warm(self, working_directory):
+        """Start the working directory's missing workers ahead of its first run."""
+        working_directory = os.path.abspath(working_directory)
+        with self._cond:
+            self._idle.setdefault(working_directory, [])
+            missing = self.size - self._count.get(working_directory, 0)
+            self._count[working_directory] = self.size
+        workers = self._spawn(working_directory, missing)
+        with self._cond:
+            self._idle[working_directory].extend(workers)
+            self._cond.notify_all()
+
+    def _spawn(self, working_directory, count):
+        # Called with count slots already reserved in _count, and without
+        # the lock: starting a worker is a fork and exec, and other callers
+        # shouldn't queue behind it.
+        workers = []
+        try:
+            for _ in range(count):
+                workers.append(PythonWorker(working_directory))
+        except WorkerCrashed:
+            for worker in workers:
+                worker.close()
+            with self._cond:
+                self._count[working_directory] -= count
+                self._cond.notify_all()
+            raise
+        return workers
+
+    def _acquire(self, working_directory):
+        with self._cond:
+            self._idle.setdefault(working_directory, [])
+            self._count.setdefault(working_directory, 0)
+            while True:
+                idle = self._idle[working_directory]
+                while idle:
+                    worker = idle.pop()
+                    if worker.alive():
+                        return worker
+                    self._count[working_directory] -= 1
+                    worker.close()
+                if self._count[working_directory] < self.size:
+                    self._count[working_directory] += 1
+                    break
+                self._cond.wait()
+        return self._spawn(working_directory, 1)[0]
+
+    def _release(self, working_directory, worker, healthy):
+        with self._cond:
+            if healthy and worker.alive() and worker.runs < self.max_runs:
+                self._idle[working_directory].append(worker)
+            else:
+                self._count[working_directory] -= 1
+                worker.close()
+            self._cond.notify()
+
+    def run(self, working_directory, abs_file_path, args, timeout, limits):
+        """Run a script on a warm worker and return a RunResult.
+
+        limits holds head_bytes, tail_bytes and kill_bytes, as for
+        output_capture.run_captured.
+        """
+        working_directory = os.path.abspath(working_directory)
+        worker = self._acquire(working_directory)
+        healthy = False
+        try:
+            response = worker.run(abs_file_path, args, timeout, limits)
+            healthy = True
+        finally:
+            self._release(working_directory, worker, healthy)
+        if response.get("timeout"):
+            raise subprocess.TimeoutExpired(["python", abs_file_path, *(args or [])], timeout)
+        return RunResult(**response)
+
+    def close(self):
+        with self._cond:
+            for workers in self._idle.values():
+                for worker in workers:
+                    worker.close()
+            self._idle.clear()
+            self._count.clear()
+
+
+_pool = None
+
+
+def enable_worker_pool(size=WORKER_POOL_SIZE, max_runs=WORKER_MAX_RUNS):
+    global _pool
+    if _pool is None and hasattr(os, "fork"):
+        _pool = PythonWorkerPool(size, max_runs)
+        atexit.register(_pool.close)
+    return _pool
+
+
+def get_worker_pool():
+    if _pool is None and PYTHON_WORKER_POOL:
+        return enable_worker_pool()
+    return _pool
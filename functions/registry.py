@@ -0,0 +1,239 @@
+"""Registry of the agent's tools.
+
+Each tool module registers its functions by decorating them with their
+declaration and metadata:
+
+    @tool(
+        description="Reads the content of a specified file ...",
+        parameters={"file_path": {"type": "STRING", "description": "..."}},
+        required=["file_path"],
+        read_only=True,
+        path_arg="file_path",
+        cacheable=True,
+    )
+    def get_file_content(working_directory, file_path, ...):
+        ...
+
+load_tools() imports every module in this package that uses @tool, so a
+new tool module needs no other registration. The registry builds each
+FunctionDeclaration, the types.Tool holding all of them, and an argument
+validator per tool at most once per process, so importing a tool doesn't
+pull in the SDK, and dispatch is a single dict lookup. The metadata tells
+the dispatcher and the tool cache what a call may read or write.
+"""
+
+import importlib
+import os
+import sys
+from functools import cache
+
+from lazy_imports import LazyModule
+
+types = LazyModule("google.genai.types")
+
+_tools = {}
+
+
+class ArgumentError(Exception):
+    pass
+
+
+class Tool:
+    """A registered tool and what it touches.
+
+    path_arg names the argument holding the path the tool reads or writes
+    (path_default if it is omitted). workspace tools may read or, unless
+    read_only, change any file under the working directory. cacheable tools
+    are read-only and their result depends only on path_arg's file or
+    directory, so results can be reused while it is unchanged.
+
+    parameters maps each argument name to its schema as a dict, in the
+    form types.Schema accepts ({"type": "STRING", "description": ...}).
+    """
+
+    def __init__(
+        self,
+        function,
+        description,
+        parameters,
+        required=(),
+        async_function=None,
+        read_only=False,
+        path_arg=None,
+        path_default=None,
+        workspace=False,
+        cacheable=False,
+    ):
+        self.name = function.__name__
+        self.function = function
+        self.description = description
+        self.parameters = parameters
+        self.required = list(required)
+        self.async_function = async_function
+        self.read_only = read_only
+        self.path_arg = path_arg
+        self.path_default = path_default
+        self.workspace = workspace or path_arg is None
+        self.cacheable = cacheable
+        self._declaration = None
+        self._validator = None
+
+    @property
+    def declaration(self):
+        if self._declaration is None:
+            parameters = {"type": "OBJECT", "properties": self.parameters}
+            if self.required:
+                parameters["required"] = self.required
+            self._declaration = types.FunctionDeclaration(
+                name=self.name, description=self.description, parameters=parameters
+            )
+        return self._declaration
+
+    def validate(self, args):
+        """Return args checked and coerced against the declared schema.
+
+        Raises ArgumentError naming the first problem found.
+        """
+        if self._validator is None:
+            self._validator = compile_validator(self.declaration.parameters, "arguments")
+        return self._validator(args or {})
+
+    def abs_path(self, args):
+        path = args.get(self.path_arg, self.path_default) or "."
+        return os.path.abspath(os.path.join(args["working_directory"], path))
+
+
+def tool(**spec):
+    """Register the decorated function as a tool; spec is Tool's arguments."""
+
+    def register(function):
+        _tools[function.__name__] = Tool(function, **spec)
+        return function
+
+    return register
+
+
+def tool_modules():
+    """Names of the modules in this package that define tools, by file name.
+
+    Modules are picked by looking for @tool in their source rather than by
+    importing everything: python_worker runs as a script and can't be
+    imported as part of the package.
+    """
+    package = sys.modules[__package__]
+    names = []
+    for directory in package.__path__:
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".py") or filename == "registry.py":
+                continue
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                if "\n@tool(" in f.read():
+                    names.append(f"{__package__}.{filename[:-3]}")
+    return names
+
+
+@cache
+def load_tools():
+    """Import every tool module and return the name -> Tool table."""
+    for module in tool_modules():
+        importlib.import_module(module)
+    return _tools
+
+
+def get_tool(name):
+    return load_tools().get(name)
+
+
+@cache
+def get_tool_declarations():
+    return types.Tool(
+        function_declarations=[entry.declaration for entry in load_tools().values()]
+    )
+
+
+def _type_name(schema):
+    kind = schema.type
+    return getattr(kind, "value", kind)
+
+
+def compile_validator(schema, where):
+    """Build a function checking a value against a types.Schema.
+
+    Integers may arrive as integral floats from the model and are converted;
+    any other mismatch raises ArgumentError.
+    """
+    kind = _type_name(schema)
+    if kind == "STRING":
+
+        def check(value):
+            if not isinstance(value, str):
+                raise ArgumentError(f"{where} must be a string")
+            return value
+
+    elif kind == "INTEGER":
+
+        def check(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ArgumentError(f"{where} must be an integer")
+            if isinstance(value, float):
+                if not value.is_integer():
+                    raise ArgumentError(f"{where} must be an integer")
+                return int(value)
+            return value
+
+    elif kind == "NUMBER":
+
+        def check(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ArgumentError(f"{where} must be a number")
+            return value
+
+    elif kind == "BOOLEAN":
+
+        def check(value):
+            if not isinstance(value, bool):
+                raise ArgumentError(f"{where} must be true or false")
+            return value
+
+    elif kind == "ARRAY":
+        check_item = compile_validator(schema.items, where + "[]") if schema.items else None
+
+        def check(value):
+            if not isinstance(value, (list, tuple)):
+                raise ArgumentError(f"{where} must be an array")
+            if check_item is None:
+                return list(value)
+            return [check_item(item) for item in value]
+
+    elif kind == "OBJECT":
+        prefix = "" if where == "arguments" else where + "."
+        properties = {
+            name: compile_validator(property_schema, prefix + name)
+            for name, property_schema in (schema.properties or {}).items()
+        }
+        required = tuple(schema.required or ())
+
+        def check(value):
+            if not isinstance(value, dict):
+                raise ArgumentError(f"{where} must be an object")
+            for name in required:
+                if value.get(name) is None:
+                    raise ArgumentError(f"missing required argument {prefix + name!r}")
+            checked = {}
+            for name, item in value.items():
+                check_property = properties.get(name)
+                if check_property is None:
+                    raise ArgumentError(
+                        f"unknown argument {prefix + name!r}; expected one of {', '.join(properties)}"
+                    )
+                # Optional arguments sent as null mean "use the default".
+                if item is not None:
+                    checked[name] = check_property(item)
+            return checked
+
+    else:
+
+        def check(value):
+            return value
+
+    return check
@@ -1,62 +1,163 @@
 import os
-import subprocess
+import sys
 
-from google.genai import types
+from config import (
+    RUN_OUTPUT_HEAD_BYTES,
+    RUN_OUTPUT_KILL_BYTES,
+    RUN_OUTPUT_TAIL_BYTES,
+    RUN_TIMEOUT,
+)
+from functions.output_capture import run_captured, run_captured_async
+from functions.python_worker_pool import WorkerCrashed, get_worker_pool
+from functions.registry import tool
+from functions.shared_utils import resolve_path
+from lazy_imports import LazyModule
+from telemetry import span
 
+asyncio = LazyModule("asyncio")
 
-def run_python_file(working_directory, file_path, args=None):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
-        return f'Error: Cannot execute "{file_path}" as it is outside the permitted working directory'
+
+def resolve_python_file(working_directory, file_path):
+    abs_file_path = resolve_path(working_directory, file_path)
+    if abs_file_path is None:
+        return None, f'Error: Cannot execute "{file_path}" as it is outside the permitted working directory'
     if not os.path.exists(abs_file_path):
-        return f'Error: File "{file_path}" not found.'
+        return None, f'Error: File "{file_path}" not found.'
     if not file_path.endswith(".py"):
-        return f'Error: "{file_path}" is not a Python file.'
+        return None, f'Error: "{file_path}" is not a Python file.'
+    return (os.path.abspath(working_directory), abs_file_path), None
+
+
+def format_run_output(result):
+    output = []
+    if result.stdout:
+        output.append(f"STDOUT:\n{result.stdout}")
+    if result.stderr:
+        output.append(f"STDERR:\n{result.stderr}")
+    if not output:
+        output.append("No output produced.")
+
+    if result.killed:
+        output.append(f"Process killed: {result.killed}")
+    elif result.returncode != 0:
+        output.append(f"Process exited with code {result.returncode}")
+    if result.stdout_truncated or result.stderr_truncated:
+        output.append(
+            f"Output truncated: {result.stdout_truncated} bytes of stdout, "
+            f"{result.stderr_truncated} bytes of stderr omitted"
+        )
+
+    return "\n".join(output)
+
+
+def python_command(abs_file_path, args):
+    commands = ["python", abs_file_path]
+    if args:
+        commands.extend(args)
+    return commands
+
+
+def output_limits():
+    return {
+        "head_bytes": RUN_OUTPUT_HEAD_BYTES,
+        "tail_bytes": RUN_OUTPUT_TAIL_BYTES,
+        "kill_bytes": RUN_OUTPUT_KILL_BYTES,
+    }
+
+
+def run_in_worker_pool(pool, abs_working_dir, abs_file_path, args):
+    """Run on the pool, or return None if the worker failed before the script ran.
+
+    A worker that dies while the script is running raises WorkerCrashed:
+    running the script a second time could repeat its side effects.
+    """
     try:
-        commands = ["python", abs_file_path]
-        if args:
-            commands.extend(args)
-        result = subprocess.run(
-            commands,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=abs_working_dir,
+        return pool.run(abs_working_dir, abs_file_path, args, RUN_TIMEOUT, output_limits())
+    except WorkerCrashed as e:
+        if e.started:
+            raise
+        print(
+            f"run_python_file: worker pool failed before running {abs_file_path} ({e}); "
+            "using a fresh interpreter",
+            file=sys.stderr,
         )
-        output = []
-        if result.stdout:
-            output.append(f"STDOUT:\n{result.stdout}")
-        if result.stderr:
-            output.append(f"STDERR:\n{result.stderr}")
+        return None
 
-        if result.returncode != 0:
-            output.append(f"Process exited with code {result.returncode}")
 
-        return "\n".join(output) if output else "No output produced."
+async def run_python_file_async(working_directory, file_path, args=None):
+    paths, error = resolve_python_file(working_directory, file_path)
+    if error:
+        return error
+    abs_working_dir, abs_file_path = paths
+    try:
+        with span("subprocess", file_path) as attrs:
+            result = None
+            pool = get_worker_pool()
+            if pool is not None:
+                # Talking to a worker blocks, so it gets a thread.
+                result = await asyncio.to_thread(
+                    run_in_worker_pool, pool, abs_working_dir, abs_file_path, args
+                )
+                attrs["worker_pool"] = result is not None
+            if result is None:
+                result = await run_captured_async(
+                    python_command(abs_file_path, args), abs_working_dir, RUN_TIMEOUT, **output_limits()
+                )
+            record_run(attrs, result)
+            return format_run_output(result)
     except Exception as e:
         return f"Error: executing Python file: {e}"
 
 
-schema_run_python_file = types.FunctionDeclaration(
-    name="run_python_file",
+@tool(
     description="Executes a Python file within the working directory and returns the output from the interpreter.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="Path to the Python file to execute, relative to the working directory.",
-            ),
-            "args": types.Schema(
-                type=types.Type.ARRAY,
-                items=types.Schema(
-                    type=types.Type.STRING,
-                    description="Optional arguments to pass to the Python file.",
-                ),
-                description="Optional arguments to pass to the Python file.",
-            ),
+    parameters={
+        "file_path": {
+            "type": "STRING",
+            "description": "Path to the Python file to execute, relative to the working directory.",
+        },
+        "args": {
+            "type": "ARRAY",
+            "items": {
+                "type": "STRING",
+                "description": "Optional arguments to pass to the Python file.",
+            },
+            "description": "Optional arguments to pass to the Python file.",
         },
-        required=["file_path"],
-    ),
+    },
+    required=["file_path"],
+    async_function=run_python_file_async,
+    workspace=True,
 )
+def run_python_file(working_directory, file_path, args=None):
+    paths, error = resolve_python_file(working_directory, file_path)
+    if error:
+        return error
+    abs_working_dir, abs_file_path = paths
+    try:
+        with span("subprocess", file_path) as attrs:
+            result = None
+            pool = get_worker_pool()
+            if pool is not None:
+                result = run_in_worker_pool(pool, abs_working_dir, abs_file_path, args)
+                attrs["worker_pool"] = result is not None
+            if result is None:
+                result = run_captured(
+                    python_command(abs_file_path, args), abs_working_dir, RUN_TIMEOUT, **output_limits()
+                )
+            record_run(attrs, result)
+            return format_run_output(result)
+    except Exception as e:
+        return f"Error: executing Python file: {e}"
+
+
+
+def record_run(attrs, result):
+    # Timings go to the trace, not the result: the result is sent back to
+    # the model, and it must not change between identical runs for cached
+    # responses to replay.
+    attrs["returncode"] = result.returncode
+    attrs["wall_time"] = round(result.wall_time, 3)
+    if result.cpu_time is not None:
+        attrs["cpu_time"] = round(result.cpu_time, 3)
+    attrs["truncated_bytes"] = result.stdout_truncated + result.stderr_truncated
@@ -0,0 +1,108 @@
+from fnmatch import fnmatch
+
+from config import SEARCH_MAX_RESULTS
+from functions.workspace_index import workspace_index
+from functions.registry import tool
+
+MAX_LINE_CHARS = 200
+SYMBOL_KINDS = ("def", "class", "import", "variable")
+
+
+def clip(line):
+    line = line.strip()
+    if len(line) > MAX_LINE_CHARS:
+        return line[:MAX_LINE_CHARS] + "..."
+    return line
+
+
+@tool(
+    description=f"Searches every text file in the working directory for lines containing a string and returns up to {SEARCH_MAX_RESULTS} matches as path:line (enclosing function or class): text. Use it to find where something is implemented before reading files.",
+    parameters={
+        "query": {
+            "type": "STRING",
+            "description": "Literal text to search for (not a regular expression).",
+        },
+        "path_pattern": {
+            "type": "STRING",
+            "description": "Optional glob on the file path relative to the working directory, e.g. '*.py' or 'pkg/*'.",
+        },
+        "case_sensitive": {
+            "type": "BOOLEAN",
+            "description": "Match case exactly. Defaults to false.",
+        },
+        "max_results": {
+            "type": "INTEGER",
+            "description": f"Maximum matches to return, at most {SEARCH_MAX_RESULTS}.",
+        },
+    },
+    required=["query"],
+    read_only=True,
+    workspace=True,
+)
+def search_code(
+    working_directory,
+    query,
+    path_pattern=None,
+    case_sensitive=False,
+    max_results=SEARCH_MAX_RESULTS,
+):
+    if not query:
+        return "Error: query must not be empty"
+    try:
+        max_results = max(1, min(int(max_results), SEARCH_MAX_RESULTS))
+        with workspace_index(working_directory) as index:
+            results = []
+            total = 0
+            files = set()
+            for entry, number, line in index.search(query, bool(case_sensitive)):
+                if path_pattern and not fnmatch(entry.rel_path, path_pattern):
+                    continue
+                total += 1
+                files.add(entry.rel_path)
+                if len(results) < max_results:
+                    scope = entry.enclosing_scope(number)
+                    where = f"{entry.rel_path}:{number}" + (f" ({scope})" if scope else "")
+                    results.append(f"{where}: {clip(line)}")
+    except Exception as e:
+        return f"Error: searching code: {e}"
+    if not results:
+        return f'No matches for "{query}"'
+    header = f'{total} matches for "{query}" in {len(files)} files'
+    if total > len(results):
+        header += f" (showing the first {len(results)}; narrow the query or use path_pattern)"
+    return header + ":\n" + "\n".join(results)
+
+
+@tool(
+    description="Finds where a Python function, class, import or module-level variable is defined in the working directory and returns path:line: kind qualified_name: source line.",
+    parameters={
+        "name": {
+            "type": "STRING",
+            "description": "Symbol name, bare ('evaluate') or qualified ('Calculator.evaluate').",
+        },
+        "kind": {
+            "type": "STRING",
+            "description": "Optional filter: one of def, class, import, variable.",
+        },
+    },
+    required=["name"],
+    read_only=True,
+    workspace=True,
+)
+def find_symbol(working_directory, name, kind=None):
+    if not name:
+        return "Error: name must not be empty"
+    if kind and kind not in SYMBOL_KINDS:
+        return f"Error: kind must be one of {', '.join(SYMBOL_KINDS)}"
+    try:
+        with workspace_index(working_directory) as index:
+            matches = index.find_symbol(name, kind)
+            results = [
+                f"{entry.rel_path}:{line}: {symbol_kind} {qualname}: {clip(entry.lines[line - 1])}"
+                for entry, qualname, symbol_kind, line in matches[:SEARCH_MAX_RESULTS]
+            ]
+    except Exception as e:
+        return f"Error: finding symbol: {e}"
+    if not results:
+        return f'No symbol named "{name}" found'
+    return "\n".join(results)
@@ -1,4 +1,6 @@
 import os
+import stat
+import tempfile
 
 
 def is_dir_inside_dir(working_directory, container_dir):
@@ -6,3 +8,46 @@ def is_dir_inside_dir(working_directory, container_dir):
     if container_dir in working_directory:
         return True
     return False
+
+
+def _read_umask():
+    # os.umask can only be read by setting it, so do that once, at import,
+    # rather than while tool threads may be creating files.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+UMASK = _read_umask()
+
+
+def resolve_path(working_directory, file_path):
+    """Absolute path of file_path, or None if it is outside working_directory."""
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+    if os.path.commonpath([abs_working_dir, abs_file_path]) != abs_working_dir:
+        return None
+    return abs_file_path
+
+
+def atomic_write(abs_file_path, content):
+    """Replace abs_file_path with content so readers see the old or new file, never half of one."""
+    directory = os.path.dirname(abs_file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(abs_file_path).st_mode))
+        except FileNotFoundError:
+            # New file: mkstemp's 0600 is stricter than open() would give.
+            os.chmod(temp_path, 0o666 & ~UMASK)
+        os.replace(temp_path, abs_file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
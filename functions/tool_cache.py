@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+
+from telemetry import annotate
+
+# Cached results that cover a whole directory rather than one file.
+LISTING_FUNCTIONS = {"get_files_info"}
+
+
+def stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def is_cacheable(tool, args):
+    # A listing deeper than one level also shows what is inside
+    # subdirectories, and changes there don't touch the listed directory's
+    # own signature.
+    if tool.name in LISTING_FUNCTIONS and (args.get("depth") or 1) > 1:
+        return False
+    return tool.cacheable
+
+
+class ToolResultCache:
+    """Per-session memo of read-only tool results.
+
+    An entry is reused while its path still has the same (mtime_ns, size,
+    inode), so a hit costs one stat. Directory listings are keyed on the
+    directory itself, which catches entries being added or removed but not
+    files changing size in place. Listings more than one level deep are not
+    cached at all. Writes made through the agent's own tools
+    evict the affected listings explicitly, and running a script clears the
+    whole cache since it may have touched anything.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Set by prefetch.Prefetcher to see results and lookups.
+        self.prefetcher = None
+
+    def call(self, tool, args):
+        """Run a registry.Tool with args, reusing or invalidating results."""
+        if is_cacheable(tool, args):
+            result = self._call_cached(tool, args)
+        else:
+            result = tool.function(**args)
+            self.record_write(tool, args)
+        if self.prefetcher is not None:
+            self.prefetcher.observe(tool, args, result)
+        return result
+
+    def key(self, tool, args):
+        return (tool.name, tool.abs_path(args), json.dumps(args, sort_keys=True, default=str))
+
+    def has(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def record_write(self, tool, args):
+        if tool.read_only:
+            return
+        if tool.workspace:
+            self.clear()
+        else:
+            self.evict_path(tool.abs_path(args))
+
+    def _call_cached(self, tool, args):
+        key = self.key(tool, args)
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.claim(key)
+        signature = stat_signature(key[1])
+        if signature is None:
+            return tool.function(**args)
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] == signature
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if prefetcher is not None:
+            prefetcher.record_lookup(tool, key, hit)
+        if hit:
+            annotate(cache_hit=True)
+            return entry[1]
+        result = tool.function(**args)
+        with self._lock:
+            self._entries[key] = (signature, result)
+        return result
+
+    def warm(self, tool, args):
+        """Run a cacheable call ahead of time and store its result.
+
+        Returns the result, or None if it was already cached or the path is
+        gone. The signature is taken before the read, so a file changed
+        during it is read again on the next lookup.
+        """
+        if not is_cacheable(tool, args):
+            return None
+        key = self.key(tool, args)
+        signature = stat_signature(key[1])
+        if signature is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return None
+        result = tool.function(**args)
+        with self._lock:
+            self._entries[key] = (signature, result)
+        return result
+
+    def evict_path(self, path):
+        with self._lock:
+            for key in list(self._entries):
+                function_name, entry_path, _ = key
+                if entry_path == path or (
+                    function_name in LISTING_FUNCTIONS
+                    and path.startswith(entry_path.rstrip(os.sep) + os.sep)
+                ):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
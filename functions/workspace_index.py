@@ -0,0 +1,218 @@
+import ast
+import os
+import threading
+from contextlib import contextmanager
+
+from config import INDEX_MAX_FILE_BYTES
+
+# Directories never worth indexing.
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", ".venv", "venv", "node_modules", ".cache"}
+
+
+def trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class FileIndex:
+    """Lines, symbols and per-line trigram postings of one file."""
+
+    def __init__(self, rel_path, signature, text):
+        self.rel_path = rel_path
+        self.signature = signature
+        # Split only on the line breaks ast counts, so line numbers agree.
+        self.lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        if self.lines[-1] == "":
+            self.lines.pop()
+        # Postings are on lowercased text so they serve case-insensitive
+        # searches too; matches are confirmed against the line itself.
+        self.postings = {}
+        for number, line in enumerate(self.lines, 1):
+            for trigram in trigrams(line.lower()):
+                self.postings.setdefault(trigram, []).append(number)
+        self.symbols = []
+        self.scopes = []
+        if rel_path.endswith(".py"):
+            self._index_python(text)
+
+    def _index_python(self, text):
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return
+        self._visit(tree.body, "", top_level=True)
+        # Innermost scope first, for enclosing_scope().
+        self.scopes.sort(key=lambda scope: scope[1] - scope[0])
+
+    def _visit(self, body, prefix, top_level=False):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                kind = "class" if isinstance(node, ast.ClassDef) else "def"
+                qualname = prefix + node.name
+                self.symbols.append((node.name, qualname, kind, node.lineno))
+                self.scopes.append((node.lineno, node.end_lineno, qualname))
+                self._visit(node.body, qualname + ".")
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    name = alias.asname or alias.name.split(".")[0]
+                    self.symbols.append((name, name, "import", node.lineno))
+            elif top_level and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        self.symbols.append((target.id, target.id, "variable", node.lineno))
+            else:
+                # Definitions nested in if/try/with/for blocks belong to the
+                # enclosing scope, e.g. an optional `try: import numpy`.
+                for field in ("body", "handlers", "orelse", "finalbody"):
+                    block = getattr(node, field, None)
+                    if isinstance(block, list):
+                        self._visit(block, prefix, top_level)
+
+    def enclosing_scope(self, line):
+        for start, end, qualname in self.scopes:
+            if start <= line <= end:
+                return qualname
+        return None
+
+
+class WorkspaceIndex:
+    """Symbol and trigram index over the files of a working directory.
+
+    refresh() stats every file and re-reads only those whose (mtime_ns,
+    size) changed, so keeping the index current costs one stat per file.
+    """
+
+    def __init__(self, working_directory, max_file_bytes=INDEX_MAX_FILE_BYTES):
+        self.root = os.path.abspath(working_directory)
+        self.max_file_bytes = max_file_bytes
+        self.files = {}
+        # trigram -> paths of the files that contain it
+        self.file_postings = {}
+        # symbol name -> paths of the files that define or import it
+        self.symbol_files = {}
+        self.lock = threading.Lock()
+        self.reindexed = 0
+
+    def refresh(self):
+        seen = set()
+        for rel_path, signature in self._walk():
+            seen.add(rel_path)
+            entry = self.files.get(rel_path)
+            if entry is None or entry.signature != signature:
+                self._remove(rel_path)
+                self._add(rel_path, signature)
+        for rel_path in list(self.files.keys() - seen):
+            self._remove(rel_path)
+
+    def _walk(self, directory=None, prefix=""):
+        directory = directory or self.root
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS and not entry.name.startswith("."):
+                    yield from self._walk(entry.path, prefix + entry.name + "/")
+            elif entry.is_file(follow_symlinks=False):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if st.st_size <= self.max_file_bytes:
+                    yield prefix + entry.name, (st.st_mtime_ns, st.st_size)
+
+    def _add(self, rel_path, signature):
+        try:
+            with open(os.path.join(self.root, rel_path), "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        if b"\0" in data:
+            # Binary file.
+            return
+        entry = FileIndex(rel_path, signature, data.decode("utf-8", errors="replace"))
+        self.files[rel_path] = entry
+        self.reindexed += 1
+        for trigram in entry.postings:
+            self.file_postings.setdefault(trigram, set()).add(rel_path)
+        for name, _, _, _ in entry.symbols:
+            self.symbol_files.setdefault(name, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        entry = self.files.pop(rel_path, None)
+        if entry is None:
+            return
+        for trigram in entry.postings:
+            paths = self.file_postings[trigram]
+            paths.discard(rel_path)
+            if not paths:
+                del self.file_postings[trigram]
+        for name, _, _, _ in entry.symbols:
+            paths = self.symbol_files.get(name)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self.symbol_files[name]
+
+    def search(self, query, case_sensitive=False):
+        """Yield (FileIndex, line_number, line) for lines containing query, by path."""
+        needle = query if case_sensitive else query.lower()
+        query_trigrams = sorted(trigrams(query.lower()), key=lambda t: len(self.file_postings.get(t, ())))
+        if query_trigrams:
+            paths = set(self.file_postings.get(query_trigrams[0], ()))
+            for trigram in query_trigrams[1:]:
+                paths &= self.file_postings.get(trigram, set())
+                if not paths:
+                    break
+        else:
+            # Shorter than a trigram: scan every line.
+            paths = self.files.keys()
+        for rel_path in sorted(paths):
+            entry = self.files[rel_path]
+            if query_trigrams:
+                numbers = set(entry.postings[query_trigrams[0]])
+                for trigram in query_trigrams[1:]:
+                    numbers.intersection_update(entry.postings[trigram])
+                numbers = sorted(numbers)
+            else:
+                numbers = range(1, len(entry.lines) + 1)
+            for number in numbers:
+                line = entry.lines[number - 1]
+                if needle in (line if case_sensitive else line.lower()):
+                    yield entry, number, line
+
+    def find_symbol(self, name, kind=None):
+        """Return (FileIndex, qualname, kind, line) for symbols called name.
+
+        name may be a bare name ("evaluate") or qualified ("Calculator.evaluate").
+        """
+        short_name = name.rsplit(".", 1)[-1]
+        matches = []
+        for rel_path in sorted(self.symbol_files.get(short_name, ())):
+            entry = self.files[rel_path]
+            for symbol_name, qualname, symbol_kind, line in entry.symbols:
+                if symbol_name != short_name or (kind and symbol_kind != kind):
+                    continue
+                if "." in name and qualname != name and not qualname.endswith("." + name):
+                    continue
+                matches.append((entry, qualname, symbol_kind, line))
+        return matches
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+@contextmanager
+def workspace_index(working_directory):
+    """Yield the shared index for working_directory, refreshed and locked."""
+    root = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = WorkspaceIndex(root)
+    with index.lock:
+        index.refresh()
+        yield index
@@ -1,12 +1,27 @@
 import os
 
-from google.genai import types
+from functions.shared_utils import atomic_write, resolve_path
+from functions.registry import tool
 
 
+@tool(
+    description="Writes content to a file within the working directory. Creates the file if it doesn't exist.",
+    parameters={
+        "file_path": {
+            "type": "STRING",
+            "description": "Path to the file to write, relative to the working directory.",
+        },
+        "content": {
+            "type": "STRING",
+            "description": "Content to write to the file",
+        },
+    },
+    required=["file_path", "content"],
+    path_arg="file_path",
+)
 def write_file(working_directory, file_path, content):
-    abs_working_dir = os.path.abspath(working_directory)
-    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    if not abs_file_path.startswith(abs_working_dir):
+    abs_file_path = resolve_path(working_directory, file_path)
+    if abs_file_path is None:
         return f'Error: Cannot write to "{file_path}" as it is outside the permitted working directory'
     if not os.path.exists(abs_file_path):
         try:
@@ -16,30 +31,9 @@ def write_file(working_directory, file_path, content):
     if os.path.exists(abs_file_path) and os.path.isdir(abs_file_path):
         return f'Error: "{file_path}" is a directory, not a file'
     try:
-        with open(abs_file_path, "w") as f:
-            f.write(content)
+        atomic_write(abs_file_path, content)
         return (
             f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
         )
     except Exception as e:
         return f"Error: writing to file: {e}"
-
-
-schema_write_file = types.FunctionDeclaration(
-    name="write_file",
-    description="Writes content to a file within the working directory. Creates the file if it doesn't exist.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="Path to the file to write, relative to the working directory.",
-            ),
-            "content": types.Schema(
-                type=types.Type.STRING,
-                description="Content to write to the file",
-            ),
-        },
-        required=["file_path", "content"],
-    ),
-)
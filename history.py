@@ -0,0 +1,94 @@
+"""Keeps the conversation sent on each turn under a token budget.
+
+Old tool results (and the large string arguments of old tool calls, such
+as write_file contents) are cut down to their head and tail; the most
+recent messages are always sent verbatim. Token counts are estimated at
+four characters per token, which is close enough to decide when to
+compact without a round trip to the count-tokens API.
+"""
+
+import json
+
+from config import HISTORY_KEEP_RECENT, HISTORY_TOKEN_BUDGET, HISTORY_TRUNCATE_CHARS
+from lazy_imports import LazyModule
+
+types = LazyModule("google.genai.types")
+
+CHARS_PER_TOKEN = 4
+ELIDED_NOTE = "characters elided from this earlier result to save context"
+
+
+def estimate_tokens(content):
+    parts = getattr(content, "parts", None)
+    if parts is None:
+        return len(str(content)) // CHARS_PER_TOKEN
+    chars = 0
+    for part in parts:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(json.dumps(part.function_call.args or {}, default=str))
+        if part.function_response:
+            chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars // CHARS_PER_TOKEN
+
+
+def truncate_text(text, limit):
+    if not isinstance(text, str) or len(text) <= limit or ELIDED_NOTE in text:
+        return text
+    head = limit // 2
+    tail = limit - head
+    elided = len(text) - limit
+    return (
+        f"{text[:head]}\n[... {elided} {ELIDED_NOTE} ...]\n{text[-tail:]}"
+    )
+
+
+def compact_part(part, limit):
+    # Copies rather than rebuilds the part, so ids (which pair a response
+    # with its call) and any other fields survive compaction.
+    if part.function_response:
+        response = part.function_response.response or {}
+        compacted = {key: truncate_text(value, limit) for key, value in response.items()}
+        if compacted != response:
+            function_response = part.function_response.model_copy(update={"response": compacted})
+            return part.model_copy(update={"function_response": function_response})
+    if part.function_call:
+        args = part.function_call.args or {}
+        compacted = {key: truncate_text(value, limit) for key, value in args.items()}
+        if compacted != args:
+            function_call = part.function_call.model_copy(update={"args": compacted})
+            return part.model_copy(update={"function_call": function_call})
+    return part
+
+
+class HistoryManager:
+    def __init__(
+        self,
+        token_budget=HISTORY_TOKEN_BUDGET,
+        keep_recent=HISTORY_KEEP_RECENT,
+        truncate_chars=HISTORY_TRUNCATE_CHARS,
+    ):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.truncate_chars = truncate_chars
+        # Estimated tokens no longer sent on every turn.
+        self.tokens_saved_per_turn = 0
+
+    def compact(self, messages):
+        """Compact messages in place; return the tokens saved by this call."""
+        total = sum(estimate_tokens(content) for content in messages)
+        if total <= self.token_budget:
+            return 0
+        saved = 0
+        for content in messages[: max(0, len(messages) - self.keep_recent)]:
+            if total - saved <= self.token_budget:
+                break
+            parts = getattr(content, "parts", None)
+            if not parts:
+                continue
+            before = estimate_tokens(content)
+            content.parts = [compact_part(part, self.truncate_chars) for part in parts]
+            saved += before - estimate_tokens(content)
+        self.tokens_saved_per_turn += saved
+        return saved
@@ -0,0 +1,22 @@
+import importlib
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access.
+
+    `types = LazyModule("google.genai.types")` at the top of a file keeps
+    `types.Content(...)` working unchanged while moving the import cost to
+    the first call that needs it. After loading, the module's namespace is
+    copied onto the proxy so later lookups are plain attribute reads.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__["_lazy_name"])
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self.__dict__['_lazy_name']!r}>"
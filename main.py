@@ -1,15 +1,19 @@
 import argparse
-import os
 import sys
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from call_function import ToolDispatcher, announce_call, call_functions, get_generate_config
+from client_manager import get_client
+from config import MAX_ITERS, SESSION_LOG_DIR, WORKING_DIR
+from functions.prefetch import Prefetcher
+from functions.python_worker_pool import enable_worker_pool
+from functions.tool_cache import ToolResultCache
+from history import HistoryManager
+from lazy_imports import LazyModule
+from response_cache import CACHE_MODES, ResponseCache
+from session_log import SessionLog, changed_files_note
+from telemetry import enable_tracing, record_usage, span
 
-from call_function import available_functions, call_function
-from prompts import system_prompt
-from fake_gemini import FakeClient
-from config import MAX_ITERS
+types = LazyModule("google.genai.types")
 
 
 def main():
@@ -20,13 +24,61 @@ def main():
 
 def get_cli_parser():
     parser = argparse.ArgumentParser(description="AI Code Assistant")
-    parser.add_argument("user_prompt", type=str, help="Prompt to send to Gemini")
+    parser.add_argument(
+        "user_prompt",
+        type=str,
+        nargs="?",
+        help="Prompt to send to Gemini (with --resume, an optional follow-up)",
+    )
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
+    parser.add_argument(
+        "--cache",
+        choices=CACHE_MODES,
+        default="bypass",
+        help="Response cache mode: bypass it, replay hits read-only, or record misses",
+    )
+    parser.add_argument(
+        "--worker-pool",
+        action="store_true",
+        help="Run Python files in pre-started worker processes",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record timing spans, append them to PATH as JSON Lines and print a summary",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses and start tool calls as soon as they arrive",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Read the files a listing turns up in the background and report the hit rate",
+    )
+    parser.add_argument(
+        "--session",
+        metavar="NAME",
+        help=(
+            "Name of the session log (default: the start time and process id). "
+            f"Every run is logged to {SESSION_LOG_DIR}, and logs are kept until deleted"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION",
+        help='Continue a logged session: its name, log path or "last"',
+    )
     args = parser.parse_args()
+    if not args.user_prompt and not args.resume:
+        parser.error("a prompt is required unless resuming a session")
     return args
 
 
 def debug_fake_ai():
+    from fake_gemini import FakeClient
+
     prompt_text = "how does the calculator render results to the console?"
     messages = [types.Content(role="user", parts=[types.Part(text=prompt_text)])]
     client = FakeClient()
@@ -34,6 +86,8 @@ def debug_fake_ai():
 
 
 def call_fake_ai():
+    from fake_gemini import FakeClient
+
     args = get_cli_parser()
     messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
     client = FakeClient()
@@ -44,43 +98,178 @@ def call_fake_ai():
 
 def call_real_ai():
     args = get_cli_parser()
-    load_dotenv()
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY environment variable not set")
-
-    client = genai.Client(api_key=api_key)
-    messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
-    if args.verbose:
+    client = ResponseCache(mode=args.cache).wrap(get_client())
+    if args.worker_pool:
+        enable_worker_pool().warm(WORKING_DIR)
+    if args.resume:
+        session_log, messages = resume_session(args)
+        if messages is None:
+            return
+    else:
+        session_log = create_session(args)
+        messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
+    if args.verbose and args.user_prompt:
         print(f"User prompt: {args.user_prompt}\n")
-    call_generate_content(client, messages, args.verbose)
+    tracer = enable_tracing() if args.trace else None
+    try:
+        call_generate_content(
+            client, messages, args.verbose, args.stream, args.prefetch, session_log
+        )
+    finally:
+        session_log.close()
+        if tracer:
+            tracer.export_jsonl(args.trace)
+            tracer.print_summary()
+
 
+def create_session(args):
+    try:
+        return SessionLog.create(args.session)
+    except FileExistsError:
+        print(f'Error: session "{args.session}" already exists; continue it with --resume {args.session}')
+        sys.exit(1)
 
-def call_generate_content(client, messages, is_verbose):
+
+def resume_session(args):
+    """Return the session log and messages to continue with.
+
+    messages is None if the session already finished and there is no
+    follow-up prompt; its final response is printed instead.
+    """
+    session_log, messages, final_response, changed = SessionLog.resume(args.resume)
+    print(f"Resuming session {session_log.name} ({len(messages)} messages)")
+    if final_response is not None and not args.user_prompt:
+        session_log.close()
+        print(f"Final response:\n{final_response}")
+        return session_log, None
+    if changed:
+        print(f"Changed since logged: {', '.join(changed)}")
+        session_log.add_user_text(messages, changed_files_note(changed))
+    if args.user_prompt:
+        session_log.add_user_text(messages, args.user_prompt)
+    return session_log, messages
+
+
+def call_generate_content(
+    client, messages, is_verbose, stream=False, prefetch=False, session_log=None
+):
+    tool_cache = ToolResultCache()
+    prefetcher = Prefetcher(tool_cache) if prefetch else None
+    history = HistoryManager()
+    generate = generate_content_stream if stream else generate_content
     iters = 0
-    while True:
-        iters += 1
-        if iters > MAX_ITERS:
-            print(f"Maximum iterations ({MAX_ITERS}) reached.")
-            sys.exit(1)
-        try:
-            final_response = generate_content(client, messages, is_verbose)
-            if final_response:
-                print(f"Final response:\n{final_response}")
-                break
-
-        except Exception as e:
-            print(f"Error in generate_content: {e}")
-
-
-def generate_content(client, messages, verbose):
-    response = client.models.generate_content(
+    try:
+        while True:
+            iters += 1
+            if iters > MAX_ITERS:
+                print(f"Maximum iterations ({MAX_ITERS}) reached.")
+                if session_log:
+                    print(f"Continue with --resume {session_log.name}")
+                sys.exit(1)
+            try:
+                report_compaction(history, history.compact(messages), is_verbose)
+                final_response = generate(client, messages, is_verbose, tool_cache)
+                if final_response:
+                    if session_log:
+                        session_log.finish(messages, final_response)
+                    if not stream:
+                        print(f"Final response:\n{final_response}")
+                    return final_response
+
+            except Exception as e:
+                print(f"Error in generate_content: {e}")
+            if session_log:
+                session_log.sync(messages)
+    finally:
+        report_prefetch(prefetcher)
+
+
+def report_prefetch(prefetcher):
+    if prefetcher is not None:
+        prefetcher.close()
+        print(prefetcher.summary())
+
+
+def report_compaction(history, saved, verbose):
+    if verbose and saved:
+        print(
+            f"History compacted: ~{saved} tokens saved this turn, "
+            f"~{history.tokens_saved_per_turn} per turn in total"
+        )
+
+
+def generate_content(client, messages, verbose, tool_cache=None):
+    with span("model", "generate_content") as attrs:
+        response = client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=messages,
+            config=get_generate_config(),
+        )
+        record_usage(attrs, response.usage_metadata)
+    if not record_response(response, messages, verbose):
+        return response.text
+
+    function_call_results = call_functions(
+        response.function_calls, verbose, tool_cache
+    )
+    record_function_results(function_call_results, messages, verbose)
+
+
+def generate_content_stream(client, messages, verbose, tool_cache=None):
+    stream = client.models.generate_content_stream(
         model="gemini-2.5-flash",
         contents=messages,
-        config=types.GenerateContentConfig(
-            tools=[available_functions], system_instruction=system_prompt
-        ),
+        config=get_generate_config(),
     )
+    parts = []
+    usage_metadata = None
+    futures = []
+    # Set while streamed text has left the cursor mid-line.
+    line_open = False
+    # Calls are announced here, in order and between lines of text, rather
+    # than from the dispatcher's threads in the middle of a line.
+    with ToolDispatcher(verbose, tool_cache=tool_cache, quiet=True) as dispatcher:
+        with span("model", "generate_content_stream") as attrs:
+            for chunk in stream:
+                usage_metadata = chunk.usage_metadata or usage_metadata
+                if not chunk.candidates or not chunk.candidates[0].content:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    if part.function_call:
+                        if line_open:
+                            print()
+                            line_open = False
+                        announce_call(part.function_call, verbose)
+                        # A function call always arrives whole in one chunk.
+                        futures.append(dispatcher.submit(part.function_call))
+                        parts.append(part)
+                    elif part.text and not part.thought:
+                        print(part.text, end="", flush=True)
+                        line_open = not part.text.endswith("\n")
+                        if parts and parts[-1].text and not parts[-1].thought:
+                            parts[-1] = types.Part(text=parts[-1].text + part.text)
+                        else:
+                            parts.append(part)
+                    else:
+                        parts.append(part)
+            record_usage(attrs, usage_metadata)
+        if line_open:
+            print(flush=True)
+        if not usage_metadata:
+            raise RuntimeError("Gemini API response appears to be malformed")
+        messages.append(types.Content(role="model", parts=parts))
+        function_call_results = [future.result() for future in futures]
+    if verbose:
+        print("Prompt tokens:", usage_metadata.prompt_token_count)
+        print("Response tokens:", usage_metadata.candidates_token_count)
+
+    if not function_call_results:
+        return "".join(part.text for part in parts if part.text and not part.thought)
+    record_function_results(function_call_results, messages, verbose)
+
+
+def record_response(response, messages, verbose):
+    """Append the model turn to messages; return True if it calls tools."""
     if not response.usage_metadata:
         raise RuntimeError("Gemini API response appears to be malformed")
 
@@ -93,12 +282,12 @@ def generate_content(client, messages, verbose):
             function_call_content = candidate.content
             messages.append(function_call_content)
 
-    if not response.function_calls:
-        return response.text
+    return bool(response.function_calls)
 
+
+def record_function_results(function_call_results, messages, verbose):
     function_responses = []
-    for function_call_part in response.function_calls:
-        function_call_result = call_function(function_call_part, verbose)
+    for function_call_result in function_call_results:
         if (
             not function_call_result.parts
             or not function_call_result.parts[0].function_response
@@ -113,8 +302,6 @@ def generate_content(client, messages, verbose):
 
     messages.append(types.Content(role="user", parts=function_responses))
 
-    # return response
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,246 @@
+"""Opt-in on-disk cache of model responses.
+
+Entries are keyed on a hash of the model name, the request config (system
+prompt and tool schemas) and the serialized message history, so replaying
+the same conversation never reaches the API. The workspace is not part of
+the key; a changed file only misses once a tool result from it enters the
+history. Streamed responses are recorded as their list of chunks, under a
+key of their own, and replayed chunk by chunk. Each entry is one JSON
+file; its mtime doubles as the LRU timestamp.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES
+from lazy_imports import LazyModule
+from telemetry import annotate
+
+types = LazyModule("google.genai.types")
+
+# bypass: never touch the cache. read: replay hits, don't store misses.
+# record: replay hits and store every miss.
+CACHE_MODES = ("bypass", "read", "record")
+
+
+def _serialize(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_serialize(item) for item in value]
+    return str(value)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        mode="record",
+        cache_dir=RESPONSE_CACHE_DIR,
+        max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.mode = mode
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # id(config) -> (config, serialized); the agent reuses one config
+        # object, so it is only dumped once. Holding a reference keeps the
+        # id from being reused by another object.
+        self._configs = {}
+
+    def _serialize_config(self, config):
+        entry = self._configs.get(id(config))
+        if entry is None or entry[0] is not config:
+            if len(self._configs) >= 16:
+                # Callers building a fresh config per request get no reuse;
+                # don't keep all of them alive.
+                self._configs.clear()
+            entry = self._configs[id(config)] = (config, _serialize(config))
+        return entry[1]
+
+    def key(self, model, contents, config, stream=False):
+        request = [model, self._serialize_config(config), _serialize(contents)]
+        if stream:
+            request.append("stream")
+        payload = json.dumps(
+            request,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        annotate(cache_hit=True)
+        return data
+
+    def get(self, key):
+        data = self._read(key)
+        if data is None:
+            return None
+        return types.GenerateContentResponse.model_validate_json(data)
+
+    def get_chunks(self, key):
+        data = self._read(key)
+        if data is None:
+            return None
+        return [types.GenerateContentResponse.model_validate(chunk) for chunk in json.loads(data)]
+
+    def put(self, key, response):
+        if not isinstance(response, types.GenerateContentResponse):
+            return
+        self._write(key, response.model_dump_json(exclude_none=True))
+
+    def put_chunks(self, key, chunks):
+        if not all(isinstance(chunk, types.GenerateContentResponse) for chunk in chunks):
+            return
+        self._write(key, json.dumps([chunk.model_dump(mode="json", exclude_none=True) for chunk in chunks]))
+
+    def _write(self, key, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def lookup(self, model, contents, config):
+        if self.mode == "bypass":
+            return None, None
+        key = self.key(model, contents, config)
+        return key, self.get(key)
+
+    def store(self, key, response):
+        if self.mode == "record" and key is not None:
+            self.put(key, response)
+
+    def lookup_stream(self, model, contents, config):
+        if self.mode == "bypass":
+            return None, None
+        key = self.key(model, contents, config, stream=True)
+        return key, self.get_chunks(key)
+
+    def store_stream(self, key, chunks):
+        if self.mode == "record" and key is not None:
+            self.put_chunks(key, chunks)
+
+    def wrap(self, client):
+        if self.mode == "bypass":
+            return client
+        return CachedClient(client, self)
+
+
+class CachedModels:
+    def __init__(self, models, cache):
+        self._models = models
+        self._cache = cache
+
+    def generate_content(self, model, contents, config):
+        key, response = self._cache.lookup(model, contents, config)
+        if response is not None:
+            return response
+        response = self._models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        self._cache.store(key, response)
+        return response
+
+    def generate_content_stream(self, model, contents, config):
+        key, chunks = self._cache.lookup_stream(model, contents, config)
+        if chunks is not None:
+            return iter(chunks)
+        stream = self._models.generate_content_stream(
+            model=model, contents=contents, config=config
+        )
+        return self._record_stream(key, stream)
+
+    def _record_stream(self, key, stream):
+        # Stored only once the stream has been read to the end.
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        self._cache.store_stream(key, chunks)
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class AsyncCachedModels(CachedModels):
+    async def generate_content(self, model, contents, config):
+        key, response = self._cache.lookup(model, contents, config)
+        if response is not None:
+            return response
+        response = await self._models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        self._cache.store(key, response)
+        return response
+
+    async def generate_content_stream(self, model, contents, config):
+        key, chunks = self._cache.lookup_stream(model, contents, config)
+        if chunks is not None:
+            return self._replay_stream(chunks)
+        stream = await self._models.generate_content_stream(
+            model=model, contents=contents, config=config
+        )
+        return self._record_stream(key, stream)
+
+    async def _replay_stream(self, chunks):
+        for chunk in chunks:
+            yield chunk
+
+    async def _record_stream(self, key, stream):
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        self._cache.store_stream(key, chunks)
+
+
+class CachedClient:
+    """Wraps a genai.Client so generate_content(_stream) goes through the cache."""
+
+    def __init__(self, client, cache):
+        self._client = client
+        self.models = CachedModels(client.models, cache)
+        self.aio = SimpleNamespace(models=AsyncCachedModels(client.aio.models, cache))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
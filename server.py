@@ -0,0 +1,450 @@
+"""Serve agent sessions over a local socket.
+
+    python server.py --unix /tmp/agent.sock
+    python server.py --port 8765 --fake fixtures/calculator_render.json
+
+The process imports the SDK and builds its client once, so a session
+costs only its own model and tool calls. Sessions run concurrently on one
+event loop (see async_agent.py), each with its tools confined to its own
+working directory under --root.
+
+The API is HTTP/1.1 with one request per connection:
+
+    POST /sessions  {"prompt": "...", "working_directory": "calculator",
+                     "max_iters": 10, "timeout": 120, "prefetch": false}
+    GET  /status
+
+POST /sessions answers 200 and streams newline-delimited JSON events while
+the session runs: "accepted", then a "model" and a "tool_results" event
+per turn, then "done" or "error". At most --max-sessions run at once and
+up to --max-queued more wait for a slot. Past that, or after waiting
+SERVER_QUEUE_TIMEOUT seconds, the answer is 503 with Retry-After.
+max_iters and timeout default to, and are capped at, the server's limits.
+
+    curl -N --unix-socket /tmp/agent.sock -d '{"prompt": "..."}' http://agent/sessions
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import itertools
+import json
+import os
+import signal
+import stat
+import sys
+import time
+
+from config import (
+    MAX_ITERS,
+    SERVER_MAX_QUEUED,
+    SERVER_MAX_REQUEST_BYTES,
+    SERVER_MAX_SESSIONS,
+    SERVER_QUEUE_TIMEOUT,
+    SERVER_READ_TIMEOUT,
+    SERVER_SESSION_TIMEOUT,
+    WORKING_DIR,
+)
+from lazy_imports import LazyModule
+
+types = LazyModule("google.genai.types")
+
+# Connections waiting to be accepted. Turning load away is admission
+# control's job, with a 503, not the kernel's with a reset.
+LISTEN_BACKLOG = 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Content Too Large",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+async def read_request(reader, max_bytes=SERVER_MAX_REQUEST_BYTES):
+    """Return (method, path, body) of one HTTP/1.1 request."""
+    parts = (await reader.readline()).decode("latin-1").split()
+    if len(parts) != 3:
+        raise HTTPError(400, "malformed request line")
+    method, target, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", ""):
+        raise HTTPError(400, "chunked request bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > max_bytes:
+        raise HTTPError(413, f"request body is over {max_bytes} bytes")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, target.split("?", 1)[0], body
+
+
+def response_head(status, content_type, headers=None):
+    lines = [
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+        f"Content-Type: {content_type}",
+        "Connection: close",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer, status, payload, headers=None):
+    body = json.dumps(payload).encode()
+    headers = {"Content-Length": len(body), **(headers or {})}
+    writer.write(response_head(status, "application/json", headers) + body)
+    await writer.drain()
+
+
+def turn_events(contents):
+    """Events for the contents one iteration of the agent loop added."""
+    for content in contents:
+        parts = content.parts or []
+        if content.role == "model":
+            yield {
+                "event": "model",
+                "text": "".join(part.text for part in parts if part.text and not part.thought),
+                "function_calls": [
+                    {"name": part.function_call.name, "args": part.function_call.args or {}}
+                    for part in parts
+                    if part.function_call
+                ],
+            }
+            continue
+        results = [
+            {"name": part.function_response.name, "response": part.function_response.response}
+            for part in parts
+            if part.function_response
+        ]
+        if results:
+            yield {"event": "tool_results", "results": results}
+
+
+class AgentServer:
+    """Admits, runs and streams agent sessions; see the module docstring.
+
+    client_factory returns the client for a new session: the shared Gemini
+    client, or a fresh scripted one since those keep per-session state.
+    """
+
+    def __init__(
+        self,
+        client_factory,
+        root=".",
+        max_sessions=SERVER_MAX_SESSIONS,
+        max_queued=SERVER_MAX_QUEUED,
+        max_iters=MAX_ITERS,
+        session_timeout=SERVER_SESSION_TIMEOUT,
+        queue_timeout=SERVER_QUEUE_TIMEOUT,
+        verbose=False,
+    ):
+        self.client_factory = client_factory
+        self.root = os.path.realpath(root)
+        self.max_sessions = max_sessions
+        self.max_queued = max_queued
+        self.max_iters = max_iters
+        self.session_timeout = session_timeout
+        self.queue_timeout = queue_timeout
+        # Sessions report through their event streams; the agent loop's own
+        # per-call lines only go to stdout when asked for.
+        self.verbose = verbose
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._ids = itertools.count(1)
+        self.active = 0
+        self.queued = 0
+        self.counts = {}
+        self.rejected = 0
+        self.started = time.time()
+
+    def status(self):
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "finished": self.counts,
+            "uptime_s": round(time.time() - self.started, 1),
+            "limits": {
+                "max_sessions": self.max_sessions,
+                "max_queued": self.max_queued,
+                "max_iters": self.max_iters,
+                "timeout": self.session_timeout,
+                "queue_timeout": self.queue_timeout,
+            },
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, body = await asyncio.wait_for(
+                    read_request(reader), SERVER_READ_TIMEOUT
+                )
+            except TimeoutError:
+                raise HTTPError(408, "timed out reading the request")
+            except (ValueError, asyncio.IncompleteReadError):
+                raise HTTPError(400, "malformed request")
+            routes = {"/status": "GET", "/sessions": "POST"}
+            if path not in routes:
+                raise HTTPError(404, f"no such endpoint: {path}")
+            if method != routes[path]:
+                raise HTTPError(405, f"{path} only accepts {routes[path]}", {"Allow": routes[path]})
+            if path == "/status":
+                await send_json(writer, 200, self.status())
+            else:
+                await self.run_session(writer, body)
+        except HTTPError as e:
+            with contextlib.suppress(ConnectionError):
+                await send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def session_options(self, body):
+        """Validate a POST /sessions body against the server's limits."""
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"request body is not JSON: {e}")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "request body must be a JSON object")
+        unknown = request.keys() - {"prompt", "working_directory", "max_iters", "timeout", "prefetch"}
+        if unknown:
+            raise HTTPError(400, f"unknown fields: {', '.join(sorted(unknown))}")
+        prompt = request.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise HTTPError(400, "prompt must be a non-empty string")
+        working_directory = request.get("working_directory", WORKING_DIR)
+        if not isinstance(working_directory, str):
+            raise HTTPError(400, "working_directory must be a string")
+        # realpath so a symlink can't lead a session out of the root.
+        working_directory = os.path.realpath(os.path.join(self.root, working_directory))
+        if os.path.commonpath([working_directory, self.root]) != self.root:
+            raise HTTPError(400, "working_directory must be inside the server's root")
+        if not os.path.isdir(working_directory):
+            raise HTTPError(400, "working_directory is not a directory")
+        max_iters = request.get("max_iters", self.max_iters)
+        if isinstance(max_iters, bool) or not isinstance(max_iters, int) or max_iters < 1:
+            raise HTTPError(400, "max_iters must be a positive integer")
+        timeout = request.get("timeout", self.session_timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise HTTPError(400, "timeout must be a positive number of seconds")
+        return {
+            "prompt": prompt,
+            "working_directory": working_directory,
+            "max_iters": min(max_iters, self.max_iters),
+            "timeout": min(timeout, self.session_timeout),
+            "prefetch": bool(request.get("prefetch", False)),
+        }
+
+    async def admit(self):
+        """Wait for a session slot, or raise HTTPError(503)."""
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise HTTPError(503, "server busy: the session queue is full", {"Retry-After": "1"})
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise HTTPError(
+                503, "server busy: timed out waiting for a session slot", {"Retry-After": "5"}
+            )
+        finally:
+            self.queued -= 1
+        self.active += 1
+
+    async def run_session(self, writer, body):
+        from async_agent import call_generate_content_async
+
+        options = self.session_options(body)
+        start = time.perf_counter()
+        await self.admit()
+        session_id = next(self._ids)
+        turns = 0
+        agent = None
+
+        def emit(event):
+            if writer.is_closing():
+                # The caller went away; stop spending tokens on it.
+                if agent is not None:
+                    agent.cancel()
+                return
+            writer.write(json.dumps(event, default=str).encode() + b"\n")
+
+        def on_turn(contents, error):
+            nonlocal turns
+            turns += 1
+            for event in turn_events(contents):
+                event["turn"] = turns
+                emit(event)
+            if error is not None:
+                emit({"event": "turn_error", "turn": turns, "message": str(error)})
+
+        try:
+            writer.write(response_head(200, "application/x-ndjson"))
+            emit(
+                {
+                    "event": "accepted",
+                    "session": session_id,
+                    "queued_s": round(time.perf_counter() - start, 3),
+                    "limits": {key: options[key] for key in ("max_iters", "timeout")},
+                }
+            )
+            messages = [types.Content(role="user", parts=[types.Part(text=options["prompt"])])]
+            agent = asyncio.create_task(
+                call_generate_content_async(
+                    self.client_factory(),
+                    messages,
+                    False,
+                    options["max_iters"],
+                    options["prefetch"],
+                    working_directory=options["working_directory"],
+                    on_turn=on_turn,
+                    quiet=not self.verbose,
+                )
+            )
+            try:
+                response = await asyncio.wait_for(agent, options["timeout"])
+                status = "done"
+                emit({"event": "done", "response": response})
+            except TimeoutError:
+                status = "timeout"
+                emit({"event": "error", "status": status, "message": "session timed out"})
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                status = "disconnected"
+            except Exception as e:
+                status = "max_iters" if turns >= options["max_iters"] else "error"
+                emit({"event": "error", "status": status, "message": str(e)})
+        finally:
+            self.active -= 1
+            self._slots.release()
+        duration = time.perf_counter() - start
+        self.counts[status] = self.counts.get(status, 0) + 1
+        emit({"event": "end", "status": status, "turns": turns, "duration_s": round(duration, 3)})
+        print(
+            f"session {session_id}: {status} after {turns} turns in {duration:.2f}s",
+            file=sys.stderr,
+        )
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+
+
+def make_client_factory(fake=None, latency=None, cache_mode="bypass"):
+    if fake:
+        from fake_gemini import ScriptedClient
+
+        # Scripted clients carry per-session state, so each session gets one.
+        return lambda: ScriptedClient.from_fixture(fake, latency)
+    from client_manager import get_client
+    from response_cache import ResponseCache
+
+    client = ResponseCache(mode=cache_mode).wrap(get_client())
+    return lambda: client
+
+
+async def start_server(agent_server, unix_path=None, host="127.0.0.1", port=8765):
+    if unix_path:
+        with contextlib.suppress(FileNotFoundError):
+            # Only replace a stale socket, never some other file.
+            if stat.S_ISSOCK(os.stat(unix_path).st_mode):
+                os.unlink(unix_path)
+        return await asyncio.start_unix_server(
+            agent_server.handle, path=unix_path, backlog=LISTEN_BACKLOG
+        )
+    return await asyncio.start_server(agent_server.handle, host, port, backlog=LISTEN_BACKLOG)
+
+
+async def serve(args):
+    from call_function import get_generate_config
+
+    # Pay for the SDK import, the agent loop's imports and the request
+    # config before the first session rather than during it.
+    importlib.import_module("async_agent")
+    get_generate_config()
+    if args.worker_pool:
+        from functions.python_worker_pool import enable_worker_pool
+
+        enable_worker_pool()
+    agent_server = AgentServer(
+        make_client_factory(args.fake, args.latency, args.cache),
+        root=args.root,
+        max_sessions=args.max_sessions,
+        max_queued=args.max_queued,
+        max_iters=args.max_iters,
+        session_timeout=args.timeout,
+        verbose=args.verbose,
+    )
+    server = await start_server(agent_server, args.unix, args.host, args.port)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving agent sessions on {where}", file=sys.stderr, flush=True)
+    # Stop on SIGTERM as on Ctrl-C, so the socket file is removed.
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if args.unix:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(args.unix)
+
+
+def main():
+    from response_cache import CACHE_MODES
+
+    parser = argparse.ArgumentParser(description="Serve agent sessions over a local socket")
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--root", default=".", help="Directory that session working directories must be inside"
+    )
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    parser.add_argument("--max-queued", type=int, default=SERVER_MAX_QUEUED)
+    parser.add_argument("--max-iters", type=int, default=MAX_ITERS)
+    parser.add_argument(
+        "--timeout", type=float, default=SERVER_SESSION_TIMEOUT, help="Per-session time limit in seconds"
+    )
+    parser.add_argument(
+        "--fake", metavar="FIXTURE", help="Use a scripted client fixture instead of Gemini"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=None, help="Simulated model latency for --fake"
+    )
+    parser.add_argument("--cache", choices=CACHE_MODES, default="bypass")
+    parser.add_argument(
+        "--worker-pool",
+        action="store_true",
+        help="Run Python files in pre-started worker processes",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Print every session's tool calls on stdout"
+    )
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt, asyncio.CancelledError):
+        asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Append-only on-disk log of an agent session, for --resume.
+
+Each record is a 4-byte big-endian length followed by that many bytes of
+zlib-compressed JSON. The first record describes the session; then come
+the conversation's contents in order, "note" records (user text added to
+the last content on resume), and a "done" record holding the final
+response once the model stops calling tools.
+
+A record is written once its turn is complete, so a process that dies or
+stops at MAX_ITERS loses at most the turn in flight, and a torn record at
+the end of the file is dropped on resume. Model turns record the
+(mtime_ns, size) of every file or directory their tool calls named, after
+the calls ran, so resuming can tell the model which of them have changed
+since.
+
+The CLIs log every run to SESSION_LOG_DIR and nothing prunes it; delete
+old logs by hand.
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+
+from config import SESSION_LOG_DIR, WORKING_DIR
+from functions.registry import get_tool
+from lazy_imports import LazyModule
+
+types = LazyModule("google.genai.types")
+
+LENGTH = struct.Struct(">I")
+VERSION = 1
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def session_path(session, log_dir=SESSION_LOG_DIR):
+    """Path of a session's log: a path, a name in log_dir, or "last"."""
+    if session == "last":
+        try:
+            with os.scandir(log_dir) as it:
+                logs = [entry for entry in it if entry.name.endswith(".log")]
+        except OSError:
+            logs = []
+        if not logs:
+            raise FileNotFoundError(f"No session logs in {log_dir}")
+        return max(logs, key=lambda entry: entry.stat().st_mtime_ns).path
+    if os.sep in session or session.endswith(".log"):
+        return session
+    return os.path.join(log_dir, f"{session}.log")
+
+
+def read_records(path):
+    """Return the log's complete records and the offset just past the last one."""
+    with open(path, "rb") as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset + LENGTH.size <= len(data):
+        (length,) = LENGTH.unpack_from(data, offset)
+        end = offset + LENGTH.size + length
+        if end > len(data):
+            break
+        try:
+            record = json.loads(zlib.decompress(data[offset + LENGTH.size : end]))
+        except (zlib.error, ValueError):
+            break
+        records.append(record)
+        offset = end
+    return records, offset
+
+
+def pending_calls(content):
+    # A model turn whose tool calls have not been answered yet.
+    return content.role == "model" and any(part.function_call for part in content.parts or ())
+
+
+class SessionLog:
+    def __init__(self, path, working_directory=WORKING_DIR):
+        self.path = path
+        self.name = os.path.basename(path).removesuffix(".log")
+        self.working_directory = os.path.abspath(working_directory)
+        self.logged = 0
+        self._file = None
+
+    @classmethod
+    def create(cls, name=None, log_dir=SESSION_LOG_DIR, working_directory=WORKING_DIR):
+        name = name or time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        os.makedirs(log_dir, exist_ok=True)
+        log = cls(os.path.join(log_dir, f"{name}.log"), working_directory)
+        log._file = open(log.path, "xb")
+        log._write(
+            {
+                "type": "session",
+                "version": VERSION,
+                "working_directory": log.working_directory,
+                "created": time.time(),
+            }
+        )
+        return log
+
+    @classmethod
+    def resume(cls, session, log_dir=SESSION_LOG_DIR, working_directory=WORKING_DIR):
+        """Reopen a session's log and rebuild its conversation.
+
+        Returns (log, messages, final_response, changed), where
+        final_response is set if the session finished and changed lists
+        the paths its tool calls used that differ from when they ran.
+        """
+        path = session_path(session, log_dir)
+        records, end = read_records(path)
+        if not records or records[0].get("type") != "session":
+            raise ValueError(f"{path} is not a session log")
+        if records[0]["version"] != VERSION:
+            raise ValueError(f"{path} has unsupported version {records[0]['version']}")
+        log = cls(path, working_directory)
+        messages = []
+        signatures = {}
+        final_response = None
+        for record in records[1:]:
+            kind = record["type"]
+            if kind == "content":
+                messages.append(types.Content.model_validate(record["content"]))
+                signatures.update(record.get("files", {}))
+                final_response = None
+            elif kind == "note":
+                messages[-1].parts.append(types.Part(text=record["text"]))
+            elif kind == "done":
+                final_response = record["response"]
+        if final_response is None and messages and messages[-1].role == "model":
+            # Died between logging the last turn and its "done" record.
+            final_response = "".join(part.text or "" for part in messages[-1].parts or ())
+        root = records[0]["working_directory"]
+        changed = [
+            rel_path
+            for rel_path, signature in sorted(signatures.items())
+            if file_signature(os.path.join(root, rel_path)) != signature
+        ]
+        log.logged = len(messages)
+        log._file = open(path, "r+b")
+        # Drop a record torn by a crash so new ones follow the last good one.
+        log._file.truncate(end)
+        log._file.seek(end)
+        return log, messages, final_response, changed
+
+    def _write(self, record):
+        payload = zlib.compress(json.dumps(record, separators=(",", ":")).encode(), 1)
+        self._file.write(LENGTH.pack(len(payload)) + payload)
+        self._file.flush()
+
+    def _touched_files(self, content):
+        files = {}
+        for part in content.parts or ():
+            call = part.function_call
+            tool = get_tool(call.name) if call else None
+            if tool is None or tool.path_arg is None:
+                continue
+            args = dict(call.args or {}, working_directory=self.working_directory)
+            path = tool.abs_path(args)
+            if os.path.commonpath([path, self.working_directory]) == self.working_directory:
+                files[os.path.relpath(path, self.working_directory)] = file_signature(path)
+        return files
+
+    def sync(self, messages):
+        """Append the contents added to messages since the last sync.
+
+        A trailing model turn still waiting for its tool results is left
+        for the next sync, so the log always ends on a complete turn.
+        """
+        end = len(messages)
+        if end > self.logged and pending_calls(messages[-1]):
+            end -= 1
+        for content in messages[self.logged : end]:
+            record = {"type": "content", "content": content.model_dump(mode="json", exclude_none=True)}
+            if content.role == "model":
+                files = self._touched_files(content)
+                if files:
+                    record["files"] = files
+            self._write(record)
+        self.logged = max(self.logged, end)
+
+    def add_user_text(self, messages, text):
+        """Add user text to the conversation and the log.
+
+        After a model turn the text starts a new user turn; otherwise it is
+        added to the pending user turn (e.g. the last tool results).
+        """
+        if messages and messages[-1].role == "user":
+            messages[-1].parts.append(types.Part(text=text))
+            if self.logged == len(messages):
+                self._write({"type": "note", "text": text})
+        else:
+            messages.append(types.Content(role="user", parts=[types.Part(text=text)]))
+            self.sync(messages)
+
+    def finish(self, messages, response):
+        self.sync(messages)
+        self._write({"type": "done", "response": response})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def changed_files_note(changed):
+    return (
+        "Note: the session was resumed and these files have changed since the "
+        "tool calls that used them: " + ", ".join(changed) + ". Read them again "
+        "before relying on earlier results."
+    )
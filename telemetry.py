@@ -0,0 +1,120 @@
+"""Lightweight tracing for the agent loop.
+
+Every model call, tool call and subprocess run is recorded as a span with
+its duration and attributes (token counts, argument/result sizes, cache
+hits). Tracing is off until enable_tracing() is called, and span() is then
+close to free. Code running inside a span can add attributes to it with
+annotate(), e.g. a cache reporting a hit.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_current_attrs = contextvars.ContextVar("current_span_attrs", default=None)
+
+
+class Tracer:
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind, name, **attrs):
+        token = _current_attrs.set(attrs)
+        start = time.time()
+        start_perf = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            duration = time.perf_counter() - start_perf
+            _current_attrs.reset(token)
+            record = {
+                "kind": kind,
+                "name": name,
+                "start": start,
+                "duration_ms": round(duration * 1000, 3),
+                **attrs,
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def export_jsonl(self, path):
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "a") as f:
+            for record in spans:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def summary(self):
+        groups = defaultdict(list)
+        with self._lock:
+            for record in self.spans:
+                groups[(record["kind"], record["name"])].append(record)
+        header = (
+            f"{'kind':<10} {'name':<20} {'count':>5} {'total_s':>8} {'mean_ms':>9} "
+            f"{'max_ms':>9} {'in_tok':>7} {'out_tok':>7} {'arg_B':>8} "
+            f"{'result_B':>9} {'hits':>5}"
+        )
+        lines = [header, "-" * len(header)]
+        for (kind, name), records in sorted(groups.items()):
+            durations = [record["duration_ms"] for record in records]
+
+            def total(key):
+                return sum(record.get(key) or 0 for record in records)
+
+            lines.append(
+                f"{kind:<10} {name[:20]:<20} {len(records):>5} "
+                f"{sum(durations) / 1000:>8.3f} {sum(durations) / len(records):>9.2f} "
+                f"{max(durations):>9.2f} {total('prompt_tokens'):>7} "
+                f"{total('response_tokens'):>7} {total('args_bytes'):>8} "
+                f"{total('result_bytes'):>9} {total('cache_hit'):>5}"
+            )
+        return "\n".join(lines)
+
+    def print_summary(self):
+        print(self.summary())
+
+
+_tracer = None
+
+
+def enable_tracing():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+@contextmanager
+def _null_span(attrs):
+    yield attrs
+
+
+def span(kind, name, **attrs):
+    if _tracer is None:
+        return _null_span(attrs)
+    return _tracer.span(kind, name, **attrs)
+
+
+def annotate(**attrs):
+    current = _current_attrs.get()
+    if current is not None:
+        current.update(attrs)
+
+
+def record_usage(attrs, usage_metadata):
+    if usage_metadata:
+        attrs["prompt_tokens"] = usage_metadata.prompt_token_count
+        attrs["response_tokens"] = usage_metadata.candidates_token_count
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from fake_gemini import DEFAULT_FIXTURE
+
+with tempfile.TemporaryDirectory() as tmp:
+    prompts = os.path.join(tmp, "prompts.jsonl")
+    results = os.path.join(tmp, "results.jsonl")
+    with open(prompts, "w") as f:
+        f.write(json.dumps({"prompt": "how are results rendered?", "id": "render"}) + "\n")
+        f.write("\n")
+        f.write(json.dumps({"prompt": "and again?"}) + "\n")
+    command = [sys.executable, "batch.py", prompts, results, "--workers", "2", "--fake", DEFAULT_FIXTURE]
+    run = subprocess.run(command, capture_output=True, text=True)
+    print(run.returncode, run.stdout == "", run.stderr.split(" in ")[0])
+    # (should print 0 True 2 sessions: progress goes to stderr, results to the file)
+    with open(results) as f:
+        lines = sorted((json.loads(line) for line in f), key=lambda result: str(result["id"]))
+    for result in lines:
+        print(result["id"], result["status"], result["model_calls"], result["tool_calls"], result["response"][:30])
+    # (should print ids 3 and render, both ok after 3 model calls and 2 tool calls;
+    # a prompt without an id gets its line number)
+
+    with open(prompts, "w") as f:
+        f.write(json.dumps({"id": "no-prompt"}) + "\n")
+        f.write(json.dumps({"prompt": "one more", "id": "after"}) + "\n")
+    run = subprocess.run(command, capture_output=True, text=True)
+    with open(results) as f:
+        lines = [json.loads(line) for line in f][2:]
+    print(run.returncode, sorted((result["id"], result["status"], result["error"]) for result in lines))
+    # (should print 0 and an error for no-prompt next to an ok result for after:
+    # a line without a prompt fails only its own session)
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from google.genai import types
+
+from call_function import call_functions
+
+
+def call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    calls = [
+        call("write_file", file_path="notes.txt", content="first"),
+        call("get_file_content", file_path="notes.txt"),
+        call("write_file", file_path="notes.txt", content="second"),
+        call("get_file_content", file_path="notes.txt"),
+        call("get_files_info"),
+        call("no_such_tool"),
+    ]
+    results = call_functions(calls, working_directory=tmp, quiet=True)
+    for result in results:
+        part = result.parts[0].function_response
+        print(part.name, part.response)
+    # (should read "first" then "second": a read waits for the write before it)
+    # (should end with an Unknown function error rather than raising)
+    print(open(os.path.join(tmp, "notes.txt")).read())
+    # (should print second)
+
+from functions.registry import get_tool_declarations, load_tools
+
+print(sorted(load_tools()))
+# (should list find_symbol, get_file_content, get_files_info, patch_file,
+# run_python_file, search_code and write_file, found without a module list)
+print([d.name for d in get_tool_declarations().function_declarations] == list(load_tools()))
+# (should print True: one declaration per registered tool, built on first use)
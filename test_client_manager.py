@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google.genai import types
+
+from client_manager import RetryPolicy, get_client
+
+# Stub Gemini endpoint: fails twice with retryable errors, then answers.
+FAILURES = [(429, "RESOURCE_EXHAUSTED"), (503, "UNAVAILABLE")]
+RESPONSE = {
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "stub reply"}]}}],
+    "usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 2},
+}
+requests = []
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        requests.append(self.client_address)
+        if len(requests) <= len(FAILURES):
+            code, status = FAILURES[len(requests) - 1]
+            body = {"error": {"code": code, "status": status, "message": "try again"}}
+        else:
+            code, body = 200, RESPONSE
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+client = get_client("test-key", base_url, RetryPolicy(base_delay=0.01))
+
+
+def ask():
+    return client.models.generate_content(
+        model="gemini-2.5-flash",
+        contents="hello",
+        config=types.GenerateContentConfig(),
+    )
+
+
+print(ask().text)
+# (should print "stub reply" after two retried failures)
+print(ask().text)
+print(f"requests: {len(requests)}, connections: {len(set(requests))}")
+# (should be 4 requests over a single kept-alive connection)
+print(get_client("test-key", base_url) is client)
+# (should print True: the client is shared)
+server.shutdown()
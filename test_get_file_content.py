@@ -6,3 +6,21 @@ print(get_file_content("calculator", "main.py"))
 print(get_file_content("calculator", "pkg/calculator.py"))
 print(get_file_content("calculator", "/bin/cat"))
 print(get_file_content("calculator", "pkg/does_not_exist.py"))
+print(get_file_content("calculator", "main.py", start_line=8, end_line=10))
+print(get_file_content("calculator", "main.py", offset=20, length=40))
+print(get_file_content("calculator", "main.py", start_line=500))
+print(get_file_content("calculator", "main.py", start_line=3, end_line=20, length=100))
+# (should say to continue with start_line=6, end_line=20 rather than an offset)
+
+import os
+import tempfile
+
+with tempfile.TemporaryDirectory() as tmp:
+    open(os.path.join(tmp, "empty.txt"), "w").close()
+    print(get_file_content(tmp, "empty.txt", start_line=1, end_line=10))
+    # (should print an empty range, bytes 0-0 of 0, rather than a past-the-end error)
+    print(get_file_content(tmp, "empty.txt", start_line=2))
+    # (should be an error: line 2 is past the end of an empty file)
+print(get_file_content("calculator", "main.py", offset=0, length=0))
+print(get_file_content("calculator", "main.py", start_line=1, length=-5))
+# (both should be errors rather than a range that never advances)
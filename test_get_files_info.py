@@ -1,4 +1,4 @@
-from functions.get_files_info import get_files_info
+from functions.get_file_info import get_files_info
 
 
 print(get_files_info("calculator", "."))
@@ -6,3 +6,27 @@ print(get_files_info("calculator", "pkg"))
 print(get_files_info("calculator", "/bin"))
 print(get_files_info("calculator", "../"))
 # print(get_files_info("calculator", "main.py"))
+print(get_files_info("calculator", ".", depth=3, pattern="*.py"))
+print(get_files_info("calculator", ".", depth=3, max_entries=2))
+print(get_files_info("calculator", ".", depth=3, max_entries=2, cursor="2"))
+
+import os
+import tempfile
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.mkdir(os.path.join(tmp, "calc"))
+    os.mkdir(os.path.join(tmp, "calc_secrets"))
+    print(get_files_info(os.path.join(tmp, "calc"), "../calc_secrets"))
+    # (should be an error: a sibling whose name starts with the working directory's is still outside it)
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.makedirs(os.path.join(tmp, "a", "b"))
+    open(os.path.join(tmp, "a", "b", "c.txt"), "w").close()
+    os.symlink(tmp, os.path.join(tmp, "a", "loop"))
+    print(get_files_info(tmp, ".", depth=50))
+    # (should list a, a/b, a/b/c.txt and a/loop once each: the symlinked
+    # directory is shown but not entered, so the listing doesn't cycle)
+    deep = os.path.join(tmp, *"d" * 15)
+    os.makedirs(deep)
+    print(get_files_info(tmp, "d", depth=50))
+    # (should stop ten levels down, at d/d/d/d/d/d/d/d/d/d)
@@ -0,0 +1,33 @@
+from google.genai import types
+
+from history import ELIDED_NOTE, HistoryManager, estimate_tokens
+
+
+def tool_turn(index, size):
+    call = types.FunctionCall(id=f"call-{index}", name="get_file_content", args={"file_path": f"f{index}.py"})
+    response = types.FunctionResponse(id=f"call-{index}", name="get_file_content", response={"result": "x" * size})
+    return [
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="user", parts=[types.Part(function_response=response)]),
+    ]
+
+
+messages = [types.Content(role="user", parts=[types.Part(text="read everything")])]
+for index in range(4):
+    messages += tool_turn(index, 8000)
+
+history = HistoryManager(token_budget=3000, keep_recent=2, truncate_chars=200)
+before = sum(estimate_tokens(content) for content in messages)
+saved = history.compact(messages)
+after = sum(estimate_tokens(content) for content in messages)
+print(saved > 0, before - after == saved, after <= 3000)
+# (should print True True True)
+
+results = [content.parts[0].function_response for content in messages if content.parts[0].function_response]
+print([ELIDED_NOTE in result.response["result"] for result in results])
+# (should print [True, True, True, False]: the most recent messages are sent verbatim)
+print([result.id for result in results])
+# (should print ['call-0', 'call-1', 'call-2', 'call-3']: ids still pair responses with calls)
+
+print(history.compact(messages))
+# (should print 0: already under budget, and compacted text is not compacted again)
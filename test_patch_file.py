@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+from functions.patch_file import patch_file
+from functions.write_files import write_file
+
+with tempfile.TemporaryDirectory() as tmp:
+    print(write_file(tmp, "pkg/example.py", "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"))
+
+    print(patch_file(tmp, "pkg/example.py", edits=[{"search": "return a - b", "replace": "return a - b  # difference"}]))
+    # (should report one change at line 6)
+    print(patch_file(tmp, "pkg/example.py", edits=[{"search": "(a, b)", "replace": "(x, y)"}]))
+    # (should fail: the search text matches twice)
+
+    diff = """--- a/pkg/example.py
++++ b/pkg/example.py
+@@ -1,2 +1,3 @@
+ def add(a, b):
++    \"\"\"Return the sum.\"\"\"
+     return a + b
+"""
+    print(patch_file(tmp, "pkg/example.py", diff=diff))
+    # (should report one change at line 1)
+    print(patch_file(tmp, "pkg/example.py", diff=diff.replace("+    ", "+        ").replace(" def add", " def mul")))
+    # (should fail: the hunk's context is not in the file)
+
+    with open(os.path.join(tmp, "pkg/example.py")) as f:
+        print(f.read())
+    print(sorted(os.listdir(os.path.join(tmp, "pkg"))))
+    # (no temporary files should be left behind)
+
+    print(patch_file(tmp, "../outside.py", edits=[{"search": "a", "replace": "b"}]))
+    # (this should return an error)
+    print(patch_file(tmp, "missing.py", edits=[{"search": "a", "replace": "b"}]))
+    # (this should return an error)
+
+    write_file(tmp, "query.sql", "select 1;\n-- old comment\nselect 2;\n")
+    diff = """--- a/query.sql
++++ b/query.sql
+@@ -1,3 +1,2 @@
+ select 1;
+--- old comment
+ select 2;
+"""
+    print(patch_file(tmp, "query.sql", diff=diff))
+    # (should report one change at line 1: "--- old comment" inside the hunk
+    # is a removed line, not a file header)
+    with open(os.path.join(tmp, "query.sql")) as f:
+        print(f.read())
+    # (should print select 1; and select 2; only)
+    print(patch_file(tmp, "query.sql", diff=diff.replace("@@ -1,3 +1,2 @@", "@@ -1,2 +1,1 @@")))
+    # (should fail: the hunk has more lines than its header says)
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import time
+
+from functions.prefetch import Prefetcher
+from functions.registry import get_tool
+from functions.tool_cache import ToolResultCache
+
+list_files = get_tool("get_files_info")
+read_file = get_tool("get_file_content")
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.mkdir(os.path.join(tmp, "pkg"))
+    for name, text in (("main.py", "print('main')\n"), ("pkg/util.py", "x = 1\n"), ("setup.cfg", "[metadata]\n")):
+        with open(os.path.join(tmp, name), "w") as f:
+            f.write(text)
+
+    cache = ToolResultCache()
+    prefetcher = Prefetcher(cache)
+    print(cache.call(list_files, {"working_directory": tmp, "depth": 2}))
+    time.sleep(0.1)
+    print(cache.call(read_file, {"working_directory": tmp, "file_path": "pkg/util.py"}))
+    # (should print x = 1, served from the prefetched entry)
+    print(cache.call(read_file, {"working_directory": tmp, "file_path": "setup.cfg"}))
+    print(prefetcher.summary())
+    # (should report 2 files warmed, 1 hit, 1 miss and 1 warmed but not read)
+
+    time.sleep(0.01)
+    with open(os.path.join(tmp, "main.py"), "w") as f:
+        f.write("print('changed')\n")
+    print(cache.call(read_file, {"working_directory": tmp, "file_path": "main.py"}))
+    # (should print the changed file, not the prefetched copy)
+    prefetcher.close()
+
+    cache = ToolResultCache()
+    prefetcher = Prefetcher(cache, budget_bytes=10)
+    cache.call(list_files, {"working_directory": tmp, "depth": 2})
+    time.sleep(0.1)
+    print(prefetcher.summary())
+    # (should warm only pkg/util.py and skip main.py over the budget)
+    prefetcher.close()
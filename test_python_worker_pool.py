@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+
+from functions.python_worker_pool import WorkerCrashed, enable_worker_pool
+from functions.run_python_file import run_python_file
+
+LIMITS = {"head_bytes": 4096, "tail_bytes": 4096, "kill_bytes": 1 << 20}
+
+pool = enable_worker_pool(size=1, max_runs=2)
+with tempfile.TemporaryDirectory() as tmp:
+    scripts = {
+        "hello.py": "import sys\nprint('hello', sys.argv[1:])\n",
+        "fail.py": "raise SystemExit(3)\n",
+        "kill_worker.py": "import os, signal\nos.kill(os.getppid(), signal.SIGKILL)\n",
+    }
+    for name, source in scripts.items():
+        with open(os.path.join(tmp, name), "w") as f:
+            f.write(source)
+
+    result = pool.run(tmp, os.path.join(tmp, "hello.py"), ["a"], 10, LIMITS)
+    print(repr(result.stdout), result.returncode)
+    # (should print "hello ['a']\n" 0)
+    print(pool.run(tmp, os.path.join(tmp, "fail.py"), [], 10, LIMITS).returncode)
+    # (should print 3)
+
+    try:
+        pool.run(tmp, os.path.join(tmp, "kill_worker.py"), [], 10, LIMITS)
+    except WorkerCrashed as e:
+        print("crashed while running:", e.started)
+    # (should print crashed while running: True)
+    print(run_python_file(tmp, "kill_worker.py"))
+    # (should be an error, not a second run in a fresh interpreter)
+
+    pool.warm(tmp)
+    for worker in pool._idle[os.path.abspath(tmp)]:
+        worker.process.kill()
+        worker.process.wait()
+    print(run_python_file(tmp, "hello.py", ["b"]))
+    # (should replace the dead worker and print hello ['b'])
+
+    # The "started" line and the result can reach the pool in one read.
+    from functions.python_worker_pool import PythonWorker
+
+    read = PythonWorker._read
+
+    def slow_read(worker, timeout, started):
+        if not started:
+            time.sleep(0.5)
+        return read(worker, timeout, started)
+
+    PythonWorker._read = slow_read
+    start = time.monotonic()
+    result = pool.run(tmp, os.path.join(tmp, "hello.py"), ["c"], 3, LIMITS)
+    PythonWorker._read = read
+    print(repr(result.stdout), time.monotonic() - start < 2)
+    # (should print "hello ['c']\n" True: a result already read is not waited for again)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+from google.genai import types
+
+from call_function import get_generate_config
+from fake_gemini import DEFAULT_FIXTURE, ScriptedClient
+from response_cache import ResponseCache
+
+
+def ask(client, text):
+    contents = [types.Content(role="user", parts=[types.Part(text=text)])]
+    return client.models.generate_content(model="gemini-2.5-flash", contents=contents, config=get_generate_config())
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    scripted = ScriptedClient.from_fixture(DEFAULT_FIXTURE, 0.0)
+    cache = ResponseCache(mode="record", cache_dir=tmp)
+    client = cache.wrap(scripted)
+    first = ask(client, "list the files")
+    again = ask(client, "list the files")
+    print(cache.hits, cache.misses, scripted.position)
+    # (should print 1 1 1: the repeat is served from disk without reaching the client)
+    print(first.function_calls[0].name == again.function_calls[0].name)
+    # (should print True)
+
+    ask(client, "list the files, please")
+    print(cache.hits, cache.misses, scripted.position, len(os.listdir(tmp)))
+    # (should print 1 2 2 2: different contents are a different key)
+
+    reader = ResponseCache(mode="read", cache_dir=tmp)
+    ask(reader.wrap(scripted), "something new")
+    print(reader.misses, len(os.listdir(tmp)))
+    # (should print 1 2: read mode never stores its misses)
+
+    small = ResponseCache(mode="record", cache_dir=tmp, max_bytes=1)
+    ask(small.wrap(scripted), "one more")
+    print(len(os.listdir(tmp)))
+    # (should print 0: over max_bytes, entries are evicted oldest first)
+
+print(ResponseCache(mode="bypass").wrap(scripted) is scripted)
+# (should print True: bypass leaves the client unwrapped)
+
+
+def ask_stream(client, text):
+    contents = [types.Content(role="user", parts=[types.Part(text=text)])]
+    return list(
+        client.models.generate_content_stream(model="gemini-2.5-flash", contents=contents, config=get_generate_config())
+    )
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    scripted = ScriptedClient.from_fixture(DEFAULT_FIXTURE, 0.0)
+    cache = ResponseCache(mode="record", cache_dir=tmp)
+    client = cache.wrap(scripted)
+    first = ask_stream(client, "list the files")
+    again = ask_stream(client, "list the files")
+    print(cache.hits, cache.misses, scripted.position)
+    # (should print 1 1 1: --stream --cache record replays the recorded stream)
+    print([chunk.model_dump() for chunk in first] == [chunk.model_dump() for chunk in again])
+    # (should print True: the same chunks, in order)
+    ask(client, "list the files")
+    print(cache.misses, scripted.position)
+    # (should print 2 2: a streamed and a plain response are separate entries)
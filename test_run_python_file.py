@@ -11,3 +11,23 @@ print(run_python_file("calculator", "../main.py"))
 print(run_python_file("calculator", "nonexistent.py"))
 # (this should return an error)
 print(run_python_file("calculator", "lorem.txt"))
+
+import os
+import tempfile
+
+with tempfile.TemporaryDirectory() as tmp:
+    with open(os.path.join(tmp, "noisy.py"), "w") as f:
+        f.write("for i in range(100000):\n    print(i)\n")
+    print(run_python_file(tmp, "noisy.py"))
+    # (should keep only the start and end of stdout and report the bytes truncated)
+
+from functions.python_worker_pool import PythonWorkerPool
+
+pool = PythonWorkerPool(size=1)
+with tempfile.TemporaryDirectory() as tmp:
+    with open(os.path.join(tmp, "small.py"), "w") as f:
+        f.write("print('hi')\n")
+    result = pool.run(tmp, os.path.join(tmp, "small.py"), [], 10, {"head_bytes": 4096, "tail_bytes": 4096, "kill_bytes": 1 << 20})
+    print(repr(result.stdout), repr(result.stderr), result.stdout_truncated, result.stderr_truncated)
+    # (should print 'hi\n' '' 0 0: output shorter than head_bytes is kept whole)
+pool.close()
@@ -0,0 +1,29 @@
+import os
+import tempfile
+import time
+
+from functions.search_code import find_symbol, search_code
+from functions.workspace_index import workspace_index
+
+print(search_code("calculator", "format_json_output"))
+# (should list the definition in pkg/render.py and its callers)
+print(find_symbol("calculator", "Calculator.evaluate"))
+# (should point at the method in pkg/calculator.py)
+print(find_symbol("calculator", "nothing_by_this_name"))
+# (should report no symbol found)
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "module.py")
+    with open(path, "w") as f:
+        f.write("def first():\n    return 'needle'\n")
+    print(search_code(tmp, "needle"))
+    # (should find the line inside first)
+
+    time.sleep(0.01)
+    with open(path, "w") as f:
+        f.write("def second():\n    return 'haystack'\n")
+    print(search_code(tmp, "needle"))
+    # (should find nothing: the changed file was re-indexed)
+    with workspace_index(tmp) as index:
+        print(f"files re-read: {index.reindexed}")
+        # (should be 2: the first index and the one changed file)
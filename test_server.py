@@ -0,0 +1,45 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from fake_gemini import DEFAULT_FIXTURE
+from server import AgentServer, HTTPError, make_client_factory, start_server
+
+
+async def post(unix_path, payload):
+    reader, writer = await asyncio.open_unix_connection(unix_path)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST /sessions HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0].decode(), body.decode().splitlines()
+
+
+async def main():
+    agent_server = AgentServer(make_client_factory(DEFAULT_FIXTURE, 0.0), max_iters=5)
+    for body in (b'{"prompt": ""}', b'{"prompt": "x", "working_directory": "/"}', b'{"prompt": "x", "cpu": 1}'):
+        try:
+            agent_server.session_options(body)
+        except HTTPError as e:
+            print(e.status, e)
+    # (should print three 400s: empty prompt, outside the root, unknown field)
+    print(agent_server.session_options(b'{"prompt": "x", "max_iters": 50}')["max_iters"])
+    # (should be capped at 5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        unix_path = os.path.join(tmp, "agent.sock")
+        server = await start_server(agent_server, unix_path)
+        async with server:
+            status, lines = await post(unix_path, {"prompt": "how are results rendered?"})
+            print(status)
+            print([json.loads(line)["event"] for line in lines])
+            # (should be 200 OK, then accepted, model/tool_results per turn, done and end)
+            status, lines = await post(unix_path, {"prompt": "x", "max_iters": 1})
+            print(json.loads(lines[-1]))
+            # (should end with status max_iters after 1 turn)
+    print(agent_server.status()["finished"])
+
+
+asyncio.run(main())
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from google.genai import types
+
+from fake_gemini import DEFAULT_FIXTURE, ScriptedClient
+from main import call_generate_content
+from session_log import SessionLog
+
+with tempfile.TemporaryDirectory() as tmp:
+    log = SessionLog.create("render", log_dir=tmp)
+    messages = [types.Content(role="user", parts=[types.Part(text="how are results rendered?")])]
+    with contextlib.redirect_stdout(io.StringIO()):
+        call_generate_content(ScriptedClient.from_fixture(DEFAULT_FIXTURE, 0.0), messages, False, session_log=log)
+    log.close()
+    print(f"log size: {os.path.getsize(log.path)} bytes")
+
+    log, resumed, final_response, changed = SessionLog.resume("render", log_dir=tmp)
+    log.close()
+    print(len(resumed) == len(messages), final_response[:40])
+    # (should print True and the start of the fixture's final answer)
+
+    with open(log.path, "ab") as f:
+        f.write(b"\x00\x00\x10\x00torn")
+    log, resumed, _, _ = SessionLog.resume("render", log_dir=tmp)
+    log.close()
+    print(len(resumed), os.path.getsize(log.path))
+    # (should rebuild the same messages and cut the torn record off)
+
+    workspace = os.path.join(tmp, "workspace")
+    os.mkdir(workspace)
+    with open(os.path.join(workspace, "a.py"), "w") as f:
+        f.write("x = 1\n")
+    log = SessionLog.create("edited", log_dir=tmp, working_directory=workspace)
+    call = types.FunctionCall(name="get_file_content", args={"file_path": "a.py"})
+    messages = [
+        types.Content(role="user", parts=[types.Part(text="read a.py")]),
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+    ]
+    log.sync(messages)
+    print(log.logged)
+    # (should be 1: the model turn waits for its tool results)
+    messages.append(
+        types.Content(
+            role="user",
+            parts=[types.Part.from_function_response(name="get_file_content", response={"result": "x = 1\n"})],
+        )
+    )
+    log.sync(messages)
+    log.close()
+    time.sleep(0.01)
+    with open(os.path.join(workspace, "a.py"), "w") as f:
+        f.write("x = 2\n")
+    log, resumed, final_response, changed = SessionLog.resume("edited", log_dir=tmp, working_directory=workspace)
+    print(len(resumed), final_response, changed)
+    # (should print 3 None ['a.py'])
+    log.close()
@@ -0,0 +1,51 @@
+import contextlib
+import io
+
+from google.genai import types
+
+from fake_gemini import DEFAULT_FIXTURE, ScriptedClient
+from main import call_generate_content, generate_content_stream
+
+
+def run(stream):
+    messages = [types.Content(role="user", parts=[types.Part(text="how are results rendered?")])]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        final = call_generate_content(ScriptedClient.from_fixture(DEFAULT_FIXTURE, 0.0), messages, False, stream=stream)
+    return final, [content.model_dump(exclude_none=True) for content in messages], out.getvalue()
+
+
+final, streamed, output = run(stream=True)
+final_plain, plain, _ = run(stream=False)
+print(final == final_plain, streamed == plain)
+# (should print True True: chunks are reassembled into the same conversation)
+print(output.splitlines()[:2])
+# (should print the two calls, each on its own line)
+
+
+def chunk(part):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=5, candidates_token_count=3),
+    )
+
+
+class MixedStream:
+    # One response that says something, then calls a tool, then says more.
+    class models:
+        @staticmethod
+        def generate_content_stream(model, contents, config):
+            yield chunk(types.Part(text="Let me "))
+            yield chunk(types.Part(text="look."))
+            yield chunk(types.Part(function_call=types.FunctionCall(name="get_files_info", args={})))
+            yield chunk(types.Part(text="Done"))
+
+
+messages = []
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    generate_content_stream(MixedStream, messages, False)
+print(out.getvalue().splitlines())
+# (should print ['Let me look.', ' - Calling function: get_files_info', 'Done'])
+print([part.text or part.function_call.name for part in messages[0].parts], messages[1].role)
+# (should print ['Let me look.', 'get_files_info', 'Done'] user: text chunks merged, then the tool results)
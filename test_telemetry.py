@@ -0,0 +1,43 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from google.genai import types
+
+from fake_gemini import DEFAULT_FIXTURE, ScriptedClient
+from main import call_generate_content
+from telemetry import annotate, enable_tracing, span
+
+with span("tool", "untraced") as attrs:
+    annotate(cache_hit=True)
+print(attrs)
+# (should print {}: before tracing is enabled, spans and annotate do nothing)
+
+tracer = enable_tracing()
+messages = [types.Content(role="user", parts=[types.Part(text="how are results rendered?")])]
+with contextlib.redirect_stdout(io.StringIO()):
+    call_generate_content(ScriptedClient.from_fixture(DEFAULT_FIXTURE, 0.0), messages, False)
+print([(record["kind"], record["name"]) for record in tracer.spans])
+# (should print three model calls with a tool call after each of the first two)
+model = tracer.spans[0]
+print(model["prompt_tokens"] > 0, model["response_tokens"], model["duration_ms"] >= 0)
+# (should print True 17 True)
+tool = tracer.spans[1]
+print(tool["args_bytes"], tool["result_bytes"] > 0)
+# (should print 2 True: the size of {} and of the listing)
+
+with span("tool", "annotated") as attrs:
+    annotate(cache_hit=True)
+print(tracer.spans[-1]["cache_hit"])
+# (should print True)
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "trace.jsonl")
+    tracer.export_jsonl(path)
+    with open(path) as f:
+        print(len([json.loads(line) for line in f]) == len(tracer.spans))
+    # (should print True)
+print(tracer.summary().splitlines()[0].split())
+# (should print the summary's column headers)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import time
+
+from functions.registry import get_tool, load_tools
+from functions.tool_cache import ToolResultCache
+
+load_tools()
+read = get_tool("get_file_content")
+listing = get_tool("get_files_info")
+write = get_tool("write_file")
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "a.txt")
+    with open(path, "w") as f:
+        f.write("one")
+    cache = ToolResultCache()
+    args = {"working_directory": tmp, "file_path": "a.txt"}
+    print(cache.call(read, args), cache.call(read, args), cache.hits, cache.misses)
+    # (should print one one 1 1: the second read is a hit)
+
+    time.sleep(0.01)
+    with open(path, "w") as f:
+        f.write("two!")
+    print(cache.call(read, args), cache.hits, cache.misses)
+    # (should print two! 1 2: a file changed behind the cache's back is read again)
+
+    listed = cache.call(listing, {"working_directory": tmp})
+    cache.call(write, {"working_directory": tmp, "file_path": "b.txt", "content": "new"})
+    print(cache.call(listing, {"working_directory": tmp}) != listed, cache.call(read, args), cache.hits, cache.misses)
+    # (should print True two! 2 4: writing b.txt evicts the listing but not a.txt)
+
+    cache.call(get_tool("run_python_file"), {"working_directory": tmp, "file_path": "missing.py"})
+    cache.call(read, args)
+    print(cache.hits, cache.misses)
+    # (should print 2 5: running a script clears the whole cache)
+
+    os.mkdir(os.path.join(tmp, "sub"))
+    deep = {"working_directory": tmp, "depth": 2}
+    cache.call(listing, deep)
+    with open(os.path.join(tmp, "sub", "c.txt"), "w") as f:
+        f.write("made outside the agent")
+    print("sub/c.txt" in cache.call(listing, deep), cache.hits, cache.misses)
+    # (should print True 2 5: listings deeper than one level aren't cached,
+    # since a new file in sub/ doesn't change the listed directory)